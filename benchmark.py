@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+
+import os
+import json
+import time
+import random
+import tempfile
+import argparse
+import datetime
+import tracemalloc
+
+import numpy as np
+
+import run
+
+'''replays an eclipse sequence against simulated cameras on an accelerated clock, and reports how well it was executed'''
+
+def benchmark(inputfile, rate=60.0, test=None, contact_time='c2', until=None, until_offset=0, engine='thread', latency_model=None, batch_usb=True):
+    '''runs the sequence in inputfile headless against simulated cameras, with the clock running rate times faster
+    than real time. starts test seconds from contact_time (at c1 if test is None) and stops at until + until_offset
+    (the end of the eclipse if until is None). batch_usb=False sends every usb command in a round trip of its own,
+    to compare against. returns a dict report'''
+    if batch_usb is False:
+        with open(inputfile, 'r') as file:
+            json_obj = json.load(file)
+        for camera_dct in json_obj.get('equipment', []):
+            camera_dct['batch_usb'] = False
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, os.path.basename(inputfile))
+            with open(path, 'w') as file:
+                json.dump(json_obj, file)
+            return benchmark(path, rate=rate, test=test, contact_time=contact_time, until=until, until_offset=until_offset,
+                engine=engine, latency_model=latency_model)
+    clock = run.VirtualClock(rate=rate)
+    timeholder = run.Timeholder(inputfile, plan_cache=False) # only used to resolve the start and end times
+    start = timeholder.events.get(contact_time if not test is None else 'c1') + (0 if test is None else test)
+    clock.jump(start)
+    end = None if until is None else timeholder.events.get(until) + until_offset
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    e = run.EclipseAutomation(inputfile=inputfile, nodisplay=True, nosound=True, noinput=True, engine=engine,
+        simulate=True, simulation=latency_model, clock=clock, end=end, plan_cache=False) # latency_model applies to cameras without their own
+    cpu = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+    return build_report(e, start, e.t.events.get('c4') if end is None else end, rate, cpu, wall)
+
+def build_report(e, start, end, rate, cpu, wall):
+    '''collects planned and achieved frames per action between start and end, dispatch latency and cpu time
+    from a finished run'''
+    actions = []
+    for cam_id, timeline in e.timelines.items():
+        captures = e.dispatcher.cameras[cam_id].captures
+        ran = (timeline.times >= run.to_ns(start)) & (timeline.times <= run.to_ns(end))
+        planned = np.bincount(timeline.indices[ran], minlength=len(timeline.actions))
+        for i, action in enumerate(timeline.actions):
+            achieved = sum(1 for _, a in captures if a is action)
+            if achieved == 0 and (planned[i] == 0 if not action.is_continuous() else
+                    action.time >= end or timeline.expires[i] <= run.to_ns(start)):
+                continue # outside the benchmarked window
+            actions.append({
+                'camera_id': cam_id,
+                'text': action.text,
+                'start': str(action.time),
+                'continuous': action.is_continuous(),
+                'planned': None if action.is_continuous() else int(planned[i]),
+                'achieved': achieved,
+            })
+    round_trips = {cam_id: camera.usb_latency.get('round trips', (0, 0)) for cam_id, camera in e.dispatcher.cameras.items()}
+    latency = np.array(e.dispatch_latency) / rate * 1000 # real milliseconds
+    percentiles = np.percentile(latency, [50, 95, 99]).tolist() if len(latency) else [None] * 3
+    return {
+        'rate': rate,
+        'wall_seconds': wall,
+        'cpu_seconds': cpu,
+        'dispatches': len(latency),
+        'dispatch_latency_ms': dict(zip(['p50', 'p95', 'p99'], percentiles)),
+        'usb_round_trips': {cam_id: made for cam_id, (made, saved) in round_trips.items()},
+        'usb_round_trips_saved': {cam_id: saved for cam_id, (made, saved) in round_trips.items()},
+        'actions': actions,
+    }
+
+def generate_sequence(inputfile, n, cameras=4):
+    '''returns the json of inputfile with its camera actions replaced by n single shots spread over the partial
+    phases, round robin across cameras, like a programmatically generated time-lapse'''
+    with open(inputfile, 'r') as file:
+        json_obj = json.load(file)
+    times = {e['name']: run.Event(e, None).time for e in json_obj['contact_times']}
+    partial = [('c1', (times['c2'] - times['c1']).total_seconds()), ('c3', (times['c4'] - times['c3']).total_seconds())]
+    total = sum(seconds for _, seconds in partial)
+    json_obj['equipment'] = [{'camera_id': f'camera {c}', 'backend': 'simulated'} for c in range(cameras)]
+    actions = []
+    for i in range(n):
+        offset = i * total / n
+        event, seconds = partial[0] if offset < partial[0][1] else (partial[1][0], offset - partial[0][1])
+        offset = offset if event == 'c1' else seconds
+        actions.append({'text': f'Partial {i}', 'time': event, 'offset': round(offset, 3), 'shutter': 'Partial, ND 5.0',
+            'camera_id': f'camera {i % cameras}'})
+    json_obj['camera_actions'] = actions
+    return json_obj
+
+def benchmark_scale(inputfile, n, cameras=4, queries=1000, seed=0):
+    '''loads a generated sequence of n camera actions (see generate_sequence), returns a dict report of the load
+    time, memory held by the parsed actions and the time of the per-tick queries the main loop and dashboard make'''
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, f'scale-{n}.json')
+        with open(path, 'w') as file:
+            json.dump(generate_sequence(inputfile, n, cameras), file)
+        start = time.perf_counter()
+        timeholder = run.Timeholder(path, plan_cache=False)
+        load = time.perf_counter() - start
+        del timeholder
+        tracemalloc.start() # loaded again, as tracing slows the load down
+        timeholder = run.Timeholder(path, plan_cache=False)
+        memory = tracemalloc.get_traced_memory()[0] # held once loaded, the json itself has been released
+        tracemalloc.stop()
+    start = time.perf_counter()
+    timelines = timeholder.camera_actions.build_timelines(lambda action: action.camera_id, timeholder.events)
+    compile_seconds = time.perf_counter() - start
+    actions = timeholder.camera_actions
+    first, last = timeholder.events.get('c1').time_ns, timeholder.events.get('c4').time_ns
+    rng = random.Random(seed)
+    instants = [rng.randrange(first, last) for _ in range(queries)]
+    start = time.perf_counter()
+    for now in instants:
+        actions.get(now)
+        actions.get_current(now)
+        actions.get_next_n_actions(now, 10)
+        actions.get_next_action(now)
+    query = (time.perf_counter() - start) / queries
+    return {
+        'actions': n,
+        'cameras': cameras,
+        'load_seconds': load,
+        'memory_mb': memory / 2**20,
+        'bytes_per_action': memory / n,
+        'compile_seconds': compile_seconds,
+        'instants': sum(len(t.times) for t in timelines.values()),
+        'query_ms': query * 1000,
+    }
+
+def print_scale_report(report):
+    print(f"{report['actions']} actions on {report['cameras']} cameras")
+    print(f"load: {report['load_seconds']:.2f}s, {report['memory_mb']:.1f} MB ({report['bytes_per_action']:.0f} bytes per action)")
+    print(f"timeline compile: {report['compile_seconds']:.3f}s for {report['instants']} instants")
+    print(f"per tick queries (get, get_current, get_next_n_actions, get_next_action): {report['query_ms']:.3f} ms")
+
+def print_report(report):
+    print(f"{'camera':<24} {'action':<36} {'planned':>8} {'achieved':>9}")
+    for a in report['actions']:
+        planned = 'cont.' if a['planned'] is None else a['planned']
+        flag = '' if a['planned'] is None or a['achieved'] >= a['planned'] else '  <- missed frames'
+        print(f"{str(a['camera_id'])[:24]:<24} {str(a['text'])[:36]:<36} {planned:>8} {a['achieved']:>9}{flag}")
+    lat = report['dispatch_latency_ms']
+    made, saved = sum(report['usb_round_trips'].values()), sum(report['usb_round_trips_saved'].values())
+    print(f"\n{made} usb round trips, {saved} saved by batching commands ({made + saved} unbatched)")
+    print(f"{report['dispatches']} dispatches, latency (real ms) p50: {fmt(lat['p50'])}, p95: {fmt(lat['p95'])}, p99: {fmt(lat['p99'])}")
+    print(f"ran at {report['rate']}x in {report['wall_seconds']:.1f}s wall, {report['cpu_seconds']:.1f}s cpu")
+
+def fmt(value):
+    return '-' if value is None else f'{value:.3f}'
+
+def argparser():
+    '''
+    Construct a parser to parse arguments, returns the parser
+    '''
+    parse = argparse.ArgumentParser(description="Benchmark an eclipse sequence against simulated cameras on an accelerated clock")
+    parse.add_argument('--input', type=str, default='info.json', help="Path to the JSON config file. Default is 'info.json'.")
+    parse.add_argument('--rate', type=float, default=60.0, help='How many times faster than real time the clock runs. Default is 60.')
+    parse.add_argument('--test', required=False, default=None, type=int, metavar='X', help='Start X seconds (positive or negative) from the given contact time, rather than at c1')
+    parse.add_argument('--contact_time', required=False, default='c2', choices=['c1','c2','max','c3','c4'], help='The contact time to reference with --test.')
+    parse.add_argument('--until', required=False, default=None, choices=['c1','c2','max','c3','c4'], help='Stop at this contact time, rather than the end of the eclipse')
+    parse.add_argument('--until_offset', type=int, default=0, help='Seconds relative to --until to stop at')
+    parse.add_argument('--engine', default='thread', choices=['thread', 'asyncio'], help='camera dispatch engine')
+    parse.add_argument('--capture', type=float, default=0.3, help='simulated seconds per usb capture')
+    parse.add_argument('--set_config', type=float, default=0.15, help='simulated seconds per usb shutter change')
+    parse.add_argument('--round_trip', type=float, default=0.05, help='simulated seconds of each usb command spent on the round trip, paid once by a batch of commands')
+    parse.add_argument('--no_batch', action='store_true', default=False, help='send shutter changes and captures in separate usb round trips, as before batching, to compare against')
+    parse.add_argument('--jitter', type=float, default=0.02, help='standard deviation of simulated latencies (seconds)')
+    parse.add_argument('--failure_rate', type=float, default=0.0, help='probability each simulated usb command fails')
+    parse.add_argument('--burst_fps', type=float, default=5.0, help='frames per second of a simulated camera while the serial line is held')
+    parse.add_argument('--seed', type=int, default=None, help='random seed for the latency model')
+    parse.add_argument('--output', type=str, default=None, help='also write the report to this json file')
+    parse.add_argument('--log', type=str, default=None, metavar='PATH', help='where to write the run\'s log. Default is a temporary file, removed on exit')
+    parse.add_argument('--scale', type=int, default=None, metavar='N', help='instead of replaying the sequence, load a generated one of N single shots using the contact times of --input, and report load time, memory and per tick query time')
+    parse.add_argument('--cameras', type=int, default=4, help='cameras the --scale actions are spread across')
+    return parse
+
+
+def main(args):
+    '''runs the benchmark args ask for and prints its report'''
+    if not args.scale is None:
+        report = benchmark_scale(args.input, args.scale, cameras=args.cameras, seed=0 if args.seed is None else args.seed)
+        print_scale_report(report)
+        if not args.output is None:
+            with open(args.output, 'w') as file:
+                json.dump(report, file, indent=2)
+        return
+    model = {'capture': args.capture, 'set_config': args.set_config, 'round_trip': args.round_trip, 'jitter': args.jitter,
+        'failure_rate': args.failure_rate, 'burst_fps': args.burst_fps, 'seed': args.seed}
+    report = benchmark(args.input, rate=args.rate, test=args.test, contact_time=args.contact_time,
+        until=args.until, until_offset=args.until_offset, engine=args.engine, latency_model=model, batch_usb=not args.no_batch)
+    print_report(report)
+    if not args.output is None:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+
+if __name__ == '__main__':
+    args = argparser().parse_args() # parse input arguments
+    with tempfile.TemporaryDirectory() as directory:
+        writer = run.configure_logging(os.path.join(directory, 'logfile.log') if args.log is None else args.log)
+        try:
+            main(args)
+        finally:
+            writer.stop() # flushed before the directory is removed
@@ -3,22 +3,19 @@
 import os
 import json
 import datetime
-import requests
 import argparse
-import pytz
-from dateutil import parser
-from timezonefinder import TimezoneFinder
-import serial
-import serial.tools.list_ports
-import pynmea2
 
 '''retrieves the specific eclipse contact times given your lat, lon, height, and eclipse date'''
 
+# requests, pytz, timezonefinder, dateutil, serial and pynmea2 are imported by the functions that use them,
+# so each run only loads the modules for its own path (no gps libraries when --lat/--lon are given)
+
 def get_eclipse_times(lat, lon, height, date):
     '''retrieves the specific eclipse timings given your lat (decimal), lon (decimal), height (meters), and eclipse date'''
     formatted_date = format_date(date)
     formatted_coords = f'{lat},{lon}'
     url = f'https://aa.usno.navy.mil/api/eclipses/solar/date?date={formatted_date}&coords={formatted_coords}&height={height}'
+    import requests
     response = requests.get(url) # Make the get request
     if not response.status_code == 200:
         raise Exception('query not returning valid data, check lat/lon/dates for valid inputs') # if the request was unsuccessful
@@ -29,6 +26,7 @@ def get_eclipse_times(lat, lon, height, date):
 def get_eclipses(year):
     '''get a list of eclipse datetime dates for the given year'''
     url = f'https://aa.usno.navy.mil/api/eclipses/solar/year?year={year}'
+    import requests
     response = requests.get(url) # Make the get request
     if not response.status_code == 200:
         raise Exception('unable to query for eclipse datetimes') # if the request was unsuccessful
@@ -39,6 +37,7 @@ def get_eclipses(year):
 def get_total_eclipses(year):
     '''returns a list of datetime dates for total eclipses for the given year'''
     url = f'https://aa.usno.navy.mil/api/eclipses/solar/year?year={year}'
+    import requests
     response = requests.get(url) # Make the get request
     if not response.status_code == 200:
         raise Exception('unable to query for eclipse datetimes') # if the request was unsuccessful
@@ -60,6 +59,7 @@ def format_date(input_date):
         try:
             input_date = datetime.datetime.strptime(input_date, "%Y-%m-%d")
         except ValueError:
+            from dateutil import parser
             input_date = parser.parse(input_date) # parse into a datetime object
     if isinstance(input_date, datetime.datetime) or isinstance(input_date, datetime.date):
         return input_date.strftime("%Y-%m-%d") # Format and return the date string
@@ -80,6 +80,7 @@ def parse_times(input_json, timezone):
     # converts the times into properly timezone formatted list, then a key,value pair mapped dict (where the keys are c1,c2,max,c3,c4 as in the json schema)
     time_values = [combine(e_date, pmap.get(t), timezone).isoformat() for t in ['Eclipse Begins','Totality Begins','Maximum Eclipse','Totality Ends','Eclipse Ends']]
     print(time_values)
+    from dateutil import parser
     d1 = (parser.parse(time_values[2]) - parser.parse(time_values[1])).total_seconds()
     d2 = (parser.parse(time_values[3]) - parser.parse(time_values[2])).total_seconds()
     tot = (parser.parse(time_values[3]) - parser.parse(time_values[1])).total_seconds()
@@ -88,10 +89,13 @@ def parse_times(input_json, timezone):
 
 def combine(date, time_string, timezone):
     '''combines the date object and time string to generate a datetime object, sets the timezone explicitly to utc, then formats it to the given timezone'''
+    import pytz
     return datetime.datetime.combine(date, datetime.datetime.strptime(time_string, '%H:%M:%S.%f').time()).replace(tzinfo=pytz.utc).astimezone(timezone)
         
 def get_timezone(lat, lon):
     '''returns the timezone object for the given lat and lon'''
+    import pytz
+    from timezonefinder import TimezoneFinder
     timz = TimezoneFinder() 
     return pytz.timezone(timz.timezone_at(lng=lon, lat=lat))
 
@@ -113,6 +117,9 @@ def update_contact_times(file_path, time_mapping):
 
 def find_gps_port():
     '''attempts to find and return the gps port on the computer'''
+    import serial
+    import serial.tools.list_ports
+    import pynmea2
     ports = serial.tools.list_ports.comports()
     for port in ports:
         try:
@@ -132,6 +139,8 @@ def find_gps_port():
 
 def get_current_location():
     '''attempts to get the current location from a gps dongle. returns the (lat, lon, height)'''
+    import serial
+    import pynmea2
     serial_port = find_gps_port()
     if serial_port is None:
         raise Exception('gps serial port not found! connect gps device, or specify latitude and longitude.')
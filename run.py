@@ -1,26 +1,147 @@
 #!/usr/bin/env python3
 
+import time
+import_start = time.perf_counter() # when this script started importing, see StartupTimer
 import sys
 import os
 import re
-import time
 import datetime
 import json
-import time
 import glob
-import subprocess
-import queue
 import threading
-
-import serial
-from dateutil import parser
+import heapq
+import itertools
+import contextlib
+import functools
+import collections
+import gc
+import importlib
+import random
+
+import numpy as np # eager: the shutter tables below are built on import, and every run needs it before the first dispatch
 import warnings
 import logging
+import logging.handlers
+import queue
+import atexit
 import argparse
 
 '''Script for automating eclipse based on known c1,c2,c3,c4 datetimes'''
 
-logging.basicConfig(filename='logfile.log', level=logging.DEBUG, filemode='a', format='%(asctime)s : %(name)s : %(levelname)s : %(message)s')
+class LazyModule():
+    '''stands in for a module that is only imported the first time one of its attributes is used, so a
+    restart only pays for what its code path needs. importlib's own locking makes the first use thread safe'''
+    def __init__(self, name):
+        self.name = name
+
+    def __getattr__(self, attr):
+        return getattr(importlib.import_module(self.name), attr)
+
+
+asyncio = LazyModule('asyncio') # only the asyncio engine and simulated sessions
+serial = LazyModule('serial') # only serial triggered cameras
+parser = LazyModule('dateutil.parser') # only when the json is parsed, not on a plan cache hit
+pickle = LazyModule('pickle') # only the plan cache
+hashlib = LazyModule('hashlib') # only the plan cache key
+futures = LazyModule('concurrent.futures') # only setting up several cameras at once
+subprocess = LazyModule('subprocess') # only gphoto2, which real cameras start talking to during setup, never simulated ones
+
+
+class EventFormatter(logging.Formatter):
+    '''formats structured event records (see EventLog) as the event name followed by key=value fields'''
+    def format(self, record):
+        if hasattr(record, 'event'):
+            fields = dict(camera_id=record.camera_id, action=record.action, **record.fields)
+            record.msg = ' '.join([record.event] + [f'{k}={v}' for k, v in fields.items() if not v is None])
+            record.args = ()
+        return super().format(record)
+
+
+class EnqueueHandler(logging.handlers.QueueHandler):
+    '''QueueHandler that puts the record on the queue as it is, leaving all formatting to the writer thread'''
+    def prepare(self, record):
+        return record
+
+
+class LogWriter():
+    '''background thread that drains queued log records and appends them to filename in batches, one
+    write and flush per batch, so threads that log only pay for an enqueue'''
+    def __init__(self, filename, formatter, batch=512):
+        self.filename = filename
+        self.formatter = formatter
+        self.batch = batch # most records written per flush
+        self.queue = queue.SimpleQueue()
+        self.thread = threading.Thread(target=self.run, name='Log Writer', daemon=True)
+        self.written = 0
+
+    def start(self):
+        self.thread.start()
+
+    def run(self):
+        with open(self.filename, 'a') as file:
+            while True:
+                records = [self.queue.get()] # blocks until there is something to write
+                while len(records) < self.batch:
+                    try:
+                        records.append(self.queue.get_nowait())
+                    except queue.Empty:
+                        break
+                stop = None in records
+                lines = []
+                for record in records:
+                    if record is None:
+                        continue
+                    try:
+                        lines.append(self.formatter.format(record) + '\n')
+                    except Exception as e:
+                        lines.append(f'unable to format log record {record.msg!r}: {e}\n')
+                file.writelines(lines)
+                file.flush()
+                self.written += len(lines)
+                if stop:
+                    return
+
+    def stop(self, timeout=5):
+        '''writes out everything queued so far and ends the thread'''
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join(timeout)
+
+
+class EventLog():
+    '''structured records of what happens to each trigger (event type, camera_id, action and timestamps), logged on
+    the eclipse.events logger. while quiet (during totality, see --quiet_totality) they are logged at quiet_level,
+    which with --log_level above it skips them before a record is even built'''
+    def __init__(self, name='eclipse.events', level=logging.INFO, quiet_level=logging.DEBUG):
+        self.logger = logging.getLogger(name)
+        self.level = level
+        self.quiet_level = quiet_level
+        self.quiet = False
+
+    def log(self, event, camera_id=None, action=None, level=None, **fields):
+        level = self.level if level is None else level
+        if self.quiet:
+            level = min(level, self.quiet_level)
+        if self.logger.isEnabledFor(level):
+            self.logger.log(level, event, extra={'event': event, 'camera_id': camera_id, 'action': action, 'fields': fields})
+
+    def set_quiet(self, quiet):
+        if quiet != self.quiet:
+            logging.info(f'{"lowering" if quiet else "restoring"} the level of trigger events to {logging.getLevelName(self.quiet_level if quiet else self.level)}')
+        self.quiet = quiet
+
+
+def configure_logging(filename='logfile.log', level=logging.DEBUG):
+    '''sends every log record through a queue to a LogWriter thread appending to filename, returns the writer'''
+    writer = LogWriter(filename, EventFormatter('%(asctime)s : %(name)s : %(levelname)s : %(message)s'))
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(EnqueueHandler(writer.queue))
+    writer.start()
+    atexit.register(writer.stop)
+    return writer
+
+event_log = EventLog() # trigger path events, see EventLog
 
 # shutters allowed by camera
 allowable_shutters = ["1/8000","1/6400", "1/5000", "1/4000", "1/3200", "1/2500", "1/2000",
@@ -30,6 +151,9 @@ allowable_shutters = ["1/8000","1/6400", "1/5000", "1/4000", "1/3200", "1/2500",
   "0.6", "0.8", "1","1.3","1.6", "2", "2.5", "3.2", "4", "5", "6.3", "8", "10.3", "13", 
   "15", "20", "25", "30"]
 shutters = {eval(s): s for s in allowable_shutters}
+shutter_times = np.array(list(shutters.keys())) # ascending, lines up with shutter_strings
+shutter_strings = np.array(list(shutters.values()))
+shutter_seconds = {s: t for t, s in shutters.items()} # shutter string: seconds, for bracket stops
 
 # if string is specified, shutter speed is calculated using https://umbra.nascom.nasa.gov/eclipse/980226/tables/table_26.html
 allowable_targets = ['Partial, ND 4.0', 'Partial, ND 5.0', 'Baily\'s Beads', 'Chromosphere', 'Prominences', 'Corona - 0.1 Rs',
@@ -38,7 +162,8 @@ allowable_targets = ['Partial, ND 4.0', 'Partial, ND 5.0', 'Baily\'s Beads', 'Ch
 class EclipseAutomation():
     '''main object for running eclipse automation loop'''
 
-    def __init__(self, test=None, inputfile='input.json', nodisplay=False, nosound=False, noinput=False, verbose=False, contact_time=None):
+    def __init__(self, test=None, inputfile='input.json', nodisplay=False, nosound=False, noinput=False, verbose=False, contact_time=None, engine='thread',
+            simulate=False, simulation=None, clock=None, end=None, frames=None, quiet_totality=False, plan_cache=True, timer=None, profile_startup=False):
         logging.info('--------------------starting run.--------------------') # imports for optional libraries
         self.test = test
         self.inputfile = inputfile
@@ -46,50 +171,159 @@ class EclipseAutomation():
         self.nosound = nosound
         self.noinput = noinput
         self.verbose = verbose
+        self.engine = engine
+        self.simulate = simulate # use simulated cameras instead of gphoto2/serial
+        self.simulation = simulation # default latency model for simulated cameras, see SimulatedGphotoSession
+        self.end = None if end is None else as_ns(end) # optional datetime (or nanoseconds) to stop at, rather than the end of the eclipse
+        self.quiet_totality = quiet_totality # log trigger events at a lower level between c2 and c3
+        self.refresh_interval = 0.1 # real seconds budgeted per screen refresh
+        self.totality_refresh_interval = 1.0 # between c2 and c3 the screen refreshes less often, see render_budget
+        self.render_stop = threading.Event() # ends the render thread
+        self.render_stats = {'frames': 0, 'over_budget': 0, 'seconds': 0.0}
+        self.panels = {} # panel name: (key it was built for, renderable), see update_panel
+        self.row_cache = {} # id(action): (camera id, shutter) for the tables, cleared when an enhancement factor changes
+        self.row_cache_key = None # the enhancement factors row_cache was built with
+        self.scheduler = None
+        self.dispatch_latency = [] # seconds between each camera trigger's planned instant and its dispatch
+        self.timer = StartupTimer() if timer is None else timer # passed in from __main__ to include the imports
+        self.profile_startup = profile_startup # print the startup timing on exit
         logging.info('initializing objects and parsing json')
-        self.t = Timeholder(inputfile) # parses json, creates event/phase/action objects
+        with self.timer.phase('parse json'):
+            self.t = Timeholder(inputfile, clock=clock, plan_cache=plan_cache) # parses json, creates event/phase/action objects, or loads them from the plan cache
         if not test is None:
             self.t.start_test(offset=test, event=contact_time) # test mode
-        self.dispatcher = CameraDispatch(self.t.json_obj) # instantiate the dipatch object, which will create camera objects, threads and queues
+        self.profile = CameraProfile(inputfile) # measured camera latencies, written by --calibrate
+        if not self.profile.load():
+            self.profile = None
+        dispatch_class = AsyncCameraDispatch if engine == 'asyncio' else CameraDispatch
+        self.dispatcher = dispatch_class(self.t.json_obj, timer=self.timer, simulate=simulate, simulation=simulation, clock=self.t.clock, frames_path=frames, profile=self.profile) # instantiate the dipatch object, which will create camera objects, threads and queues
+        if self.t.timelines is None:
+            with self.timer.phase('compile timelines'):
+                self.timelines = self.t.camera_actions.build_timelines(self.dispatcher.get_camera_id, self.t.events) # compiled trigger instants per camera
+            with self.timer.phase('write plan cache'):
+                self.t.save_plan(self.timelines)
+        else:
+            self.timelines = self.t.timelines
+        if not self.profile is None:
+            self.dispatcher.check_plan(self.timelines)
         if nodisplay is False:
-            self.layout = self.init_layout()
+            with self.timer.phase('build display'):
+                self.layout = self.init_layout()
         if nosound is False:
             self.announce() # nice little init announcement
         if noinput is False:
-            self.init_keyboard_listener()
+            with self.timer.phase('keyboard listener'):
+                self.init_keyboard_listener()
         self.run() # run the camera/announcement/update screen loop
+        if self.profile_startup is True:
+            print('startup timing:\n' + self.timer.report())
                  
     def run(self):
         '''main loop'''
         logging.info('Starting main loop.')
         if self.nodisplay is False:
-            with rich.live.Live(self.layout, refresh_per_second=10, screen=True):
-                self.loop()
+            with rich.live.Live(self.layout, auto_refresh=False, screen=True) as live:
+                thread = threading.Thread(target=self.render_loop, args=(live,), name='Dashboard Render', daemon=True)
+                thread.start()
+                try:
+                    self.loop()
+                finally:
+                    self.render_stop.set()
+                    thread.join()
+            stats = self.render_stats
+            logging.info(f'rendered {stats["frames"]} dashboard frames in {stats["seconds"]:.2f}s, {stats["over_budget"]} over budget')
         else:
             self.loop()
         self.dispatcher.complete()
 
     def loop(self):
-        '''main loop that dispatches actions and refreshes the screen'''
+        '''main loop that sleeps until the next deadline, then dispatches actions'''
+        self.scheduler = Scheduler(self.t.get_now_ns, clock=self.t.clock)
+        with self.timer.phase('schedule actions'):
+            self.schedule_actions()
+        self.timer.mark('ready')
+        logging.info('startup timing:\n' + self.timer.report())
         while not self.is_over():
-            now = self.t.get_now()
-            # run camera actions
-            cactions = self.t.camera_actions.get_allowable(now)
-            for caction in cactions:
-                self.dispatcher.dispatch_action(caction)
-             # run voice actions
-            if self.nosound is False:
-                vactions = self.t.get_voice_actions()
-                for va in vactions:
-                    va.play()
-            # update the layout
-            if self.nodisplay is False:
+            self.scheduler.run_next()
+
+    def render_loop(self, live):
+        '''render thread, redraws the dashboard once per render_budget (real seconds) until render_stop is set,
+        so a slow terminal can't hold up the main loop'''
+        while not self.render_stop.is_set():
+            start = time.perf_counter()
+            try:
                 self.update_layout()
-            time.sleep(.01)
+                live.refresh()
+            except Exception as e:
+                logging.error(f'error rendering the dashboard: {e}')
+            elapsed = time.perf_counter() - start
+            budget = self.render_budget()
+            self.render_stats['frames'] += 1
+            self.render_stats['seconds'] += elapsed
+            if elapsed > budget:
+                self.render_stats['over_budget'] += 1
+            self.render_stop.wait(max(0.0, budget - elapsed))
+
+    def render_budget(self):
+        '''real seconds between refreshes, longer during totality to leave the cpu to the cameras'''
+        c2, c3 = self.t.events.get('c2'), self.t.events.get('c3')
+        if not c2 is None and not c3 is None and c2.time_ns <= self.t.get_now_ns() < c3.time_ns:
+            return self.totality_refresh_interval
+        return self.refresh_interval
+
+    def schedule_actions(self):
+        '''pushes the first deadline of every camera timeline/voice action (and the screen refresh) onto the scheduler'''
+        now = self.t.get_now_ns()
+        for timeline in self.timelines.values():
+            for caction in timeline.seek(now): # continuous actions already in progress
+                if not self.dispatcher.in_progress(caction): # unless still running from before a jump
+                    self.dispatcher.dispatch_action(caction, now)
+            when = timeline.next_time()
+            if not when is None:
+                self.scheduler.schedule(when, self.run_camera_timeline, timeline)
+        self.dispatcher.set_timelines(self.timelines) # lets idle cameras pre-stage their next shutter
+        if self.nosound is False:
+            for vaction in self.t.voice_actions.actions:
+                when = vaction.next_trigger(now)
+                if not when is None:
+                    self.scheduler.schedule(when, self.run_voice_action, vaction)
+        if self.quiet_totality is True:
+            self.schedule_quiet_totality(now)
+        # wake up at the end of the eclipse so the loop can exit even if nothing else is pending
+        c4 = self.t.events.get('c4')
+        end = (None if c4 is None else c4.time_ns) if self.end is None else self.end
+        if not end is None and end > now:
+            self.scheduler.schedule(end, lambda planned: None)
+
+    def schedule_quiet_totality(self, now):
+        '''lowers the level of trigger events (see EventLog) between c2 and c3'''
+        c2, c3 = self.t.events.get('c2'), self.t.events.get('c3')
+        if c2 is None or c3 is None:
+            return
+        event_log.set_quiet(c2.time_ns <= now < c3.time_ns)
+        for event, quiet in ((c2, True), (c3, False)):
+            if event.time_ns > now:
+                self.scheduler.schedule(event.time_ns, lambda planned, quiet=quiet: event_log.set_quiet(quiet))
+
+    def run_camera_timeline(self, timeline, planned):
+        '''dispatches every trigger on the timeline that is due, then schedules the next one'''
+        now = self.t.get_now_ns()
+        for caction, when in timeline.pop_due(now):
+            self.dispatch_latency.append((now - when + caction.lead_ns()) / 1e9)
+            self.dispatcher.dispatch_action(caction, when)
+        when = timeline.next_time()
+        if not when is None:
+            self.scheduler.schedule(when, self.run_camera_timeline, timeline)
+
+    def run_voice_action(self, vaction, planned):
+        self.t.voice_actions.remove(vaction)
+        vaction.play()
 
     def is_over(self):
         '''returns True if the eclipse is over, and there are no more actions left'''
-        now = self.t.get_now()
+        now = self.t.get_now_ns()
+        if not self.end is None:
+            return now >= self.end
         if not self.t.events.is_post_eclipse(now):
             return False
         if not self.t.camera_actions.get_next_action(now) is None:
@@ -118,29 +352,62 @@ class EclipseAutomation():
         return layout
 
     def update_layout(self):
-        '''updates the panels with current information'''
-        self.layout['header'].update(self.gen_title_panel())
-        self.layout['timer'].update(self.gen_timer_panel())
-        self.layout["body"]["upper"].update(self.gen_current_table())
-        self.layout["body"]["lower"].update(self.gen_upcoming_table())
-        self.layout['footer'].update(self.gen_info_table())
+        '''updates the panels whose contents changed since the last refresh'''
+        now = self.t.get_now_ns()
+        second = now // 1_000_000_000 # everything on screen is shown to the second
+        cameras = tuple((c.current_shutter, c.currently_active, c.enhancement_factor) for c in self.dispatcher.cameras.values())
+        enhancement = tuple(state[2] for state in cameras)
+        if self.row_cache_key != enhancement:
+            self.row_cache = {} # shutters of calculated targets depend on the enhancement factor
+            self.row_cache_key = enhancement
+        status = self.clock_status()
+        self.update_panel('header', (second, status), self.gen_title_panel)
+        self.update_panel('timer', second, self.gen_timer_panel)
+        current = self.t.camera_actions.get_current(now)
+        self.update_panel('upper', (second, enhancement, tuple(id(a) for a in current)), lambda: self.gen_current_table(current))
+        upcoming = self.t.camera_actions.get_next_n_actions(now, 10)
+        self.update_panel('lower', (second, enhancement, tuple(id(a) for a in upcoming)), lambda: self.gen_upcoming_table(upcoming))
+        self.update_panel('footer', cameras, self.gen_info_table)
+
+    def update_panel(self, name, key, build):
+        '''rebuilds the named panel with build() only if key differs from the one it was last built for'''
+        if self.panels.get(name, (None,))[0] == key:
+            return
+        renderable = build()
+        self.panels[name] = (key, renderable)
+        self.layout[name].update(renderable)
+
+    def row_info(self, act):
+        '''returns the (camera id, shutter) shown for an action, cached until an enhancement factor changes'''
+        info = self.row_cache.get(id(act))
+        if info is None:
+            cam_id = self.dispatcher.get_camera_id(act)
+            camera = self.dispatcher.cameras.get(cam_id)
+            if act.bracket is None:
+                info = (cam_id, camera.determine_shutter(act))
+            else:
+                shutters = camera.bracket_shutters(act)
+                info = (cam_id, f'{shutters[0]} .. {shutters[-1]} ({len(shutters)})')
+            self.row_cache[id(act)] = info
+        return info
 
     def gen_title_panel(self):
         now = self.t.get_now()
         dat = now.strftime('%B %-d, %Y (%Z)')
         tim = now.strftime('%H:%M:%S')#'%I:%M:%S %p')
         date_text = rich.text.Text(dat, style="b blue")
-        bigtime = pyfiglet.Figlet(font="moscow").renderText(tim).replace("#", "█")
+        bigtime = render_figlet(tim, font='moscow').replace("#", "█")
         time_text = rich.text.Text(bigtime, style="b green")
         date_aligned = rich.align.Align.center(date_text)
         time_aligned = rich.align.Align.center(time_text)
         combined_text = rich.console.Group(date_aligned, time_aligned) # Use a Group to combine the centered Text objects
         # Create the panel with the combined Text objects
+        status = self.clock_status()
         title_panel = rich.panel.Panel(
             combined_text,
             box=rich.box.ROUNDED,
             padding=(1, 1),
-            title='Eclipse Automator',
+            title='Eclipse Automator' if status is None else f'Eclipse Automator [{status}]',
             subtitle='by J.P. Linick',
             border_style="blue",
         )
@@ -152,15 +419,15 @@ class EclipseAutomation():
         time_until = format_hms(now, nexte)
         #txt = '{} until {}'.format(time_until, nexte)
         next_phase = rich.align.Align.center(rich.text.Text(f'{nexte} in ', style="yellow"))
-        bigtxt = pyfiglet.figlet_format(time_until, font='moscow', width=150)
+        bigtxt = render_figlet(time_until, font='moscow', width=150)
         blocktxt = rich.align.Align.center(rich.text.Text(re.sub(r'[0-9#:]', "█", bigtxt), style="b green"))
         combined_text = rich.console.Group(next_phase, blocktxt)
         return combined_text
 
-    def gen_current_table(self):
-        '''generates the table for upcoming camera actions'''
-        now = self.t.get_now()
-        actions = self.t.camera_actions.get_current(now)
+    def gen_current_table(self, actions=None):
+        '''generates the table for current camera actions'''
+        if actions is None:
+            actions = self.t.camera_actions.get_current(self.t.get_now())
         table = rich.table.Table(title='Current Camera Actions', expand=True)
         #table.add_column("(sec)", justify="center", style="cyan", no_wrap=True, min_width=10)
         table.add_column("Time Remaining (sec)", min_width=30)
@@ -172,8 +439,7 @@ class EclipseAutomation():
             dt =  act.time_left()
             progbar = progressbar(dt, length=30, max_sec=30)
             typ = act.text
-            cam_id = self.dispatcher.get_camera_id(act)
-            shutt = self.dispatcher.cameras.get(cam_id).determine_shutter(act)
+            cam_id, shutt = self.row_info(act)
             intvl = str(int(act.interval)) if act.interval is not None else ''
             if act.is_active():
                 int_txt = rich.text.Text(intvl, style="on yellow")
@@ -182,10 +448,10 @@ class EclipseAutomation():
             table.add_row(progbar, str(typ), str(cam_id), str(shutt), int_txt)
         return table
 
-    def gen_upcoming_table(self, n=10):
+    def gen_upcoming_table(self, actions=None, n=10):
         '''generates the table for upcoming camera actions'''
-        now = self.t.get_now()
-        actions = self.t.camera_actions.get_next_n_actions(now, n)
+        if actions is None:
+            actions = self.t.camera_actions.get_next_n_actions(self.t.get_now(), n)
         table = rich.table.Table(title='Upcoming Camera Actions', expand=True)
         table.add_column("Time Until Action Initiates (sec)", justify='left', min_width=40, max_width=40)
         table.add_column("Type", style="magenta", min_width=30)
@@ -197,8 +463,7 @@ class EclipseAutomation():
             dt = act.time_until()
             progbar = progressbar(dt, length=40, max_sec=40)
             typ = act.text
-            cam_id = self.dispatcher.get_camera_id(act)
-            shutt = self.dispatcher.cameras.get(cam_id).determine_shutter(act)
+            cam_id, shutt = self.row_info(act)
             dur = progressbar(act.duration(), length=30, max_sec=30, text_left=False)
             intvl = str(int(act.interval)) if act.interval is not None else ''
             table.add_row(progbar, str(typ), str(cam_id), str(shutt), dur, str(intvl))
@@ -249,9 +514,48 @@ class EclipseAutomation():
                 self.enhancement_down()
             elif key == keyboard.Key.esc:
                 self.exit()
+            elif isinstance(self.t.clock, VirtualClock): # time controls, only when rehearsing with --speed
+                if key == keyboard.Key.space:
+                    self.toggle_pause()
+                elif key == keyboard.Key.right:
+                    self.jump_to_next_event()
+                elif getattr(key, 'char', None) in ('+', '='):
+                    self.t.clock.set_rate(self.t.clock.rate * 2)
+                elif getattr(key, 'char', None) == '-':
+                    self.t.clock.set_rate(self.t.clock.rate / 2)
         except AttributeError as e:
             logging.error('Error in key press: %s', e)
 
+    def clock_status(self):
+        '''returns a short description of the clock when it isn't running at real time, None otherwise'''
+        if self.t.clock.paused:
+            return 'paused'
+        if self.t.clock.rate != 1:
+            return f'{self.t.clock.rate:g}x'
+        return None
+
+    def toggle_pause(self):
+        if self.t.clock.paused:
+            self.t.clock.resume()
+        else:
+            self.t.clock.pause()
+
+    def jump_to_next_event(self, lead=10):
+        '''jumps the clock to lead seconds before the next contact time that is more than lead seconds away'''
+        target = self.t.get_now() + datetime.timedelta(seconds=lead + 1)
+        times = [e.time for e in self.t.events.events if e.time > target]
+        if times:
+            self.jump(min(times) - datetime.timedelta(seconds=lead))
+
+    def jump(self, when):
+        '''moves the clock to the datetime when. the jump runs on the main loop, which then reschedules everything'''
+        self.scheduler.schedule(self.t.get_now_ns(), self.jump_now, when)
+
+    def jump_now(self, when, planned):
+        self.t.clock.jump(when)
+        self.scheduler.clear()
+        self.schedule_actions() # timelines are re-seeked from the new time
+
     def enhancement_up(self):
         logging.info(f'raising enhancement factor')
         for camera in self.dispatcher.cameras.values():
@@ -288,25 +592,490 @@ class RichOutput:
         pass  # No need
 
 
+class Clock():
+    '''the wall clock, shifted by offset seconds (used to emulate an eclipse). everything that reads or
+    waits on eclipse time goes through a clock, so it can be swapped for a VirtualClock.
+    time is read as integer nanoseconds since the epoch, anchored to time.monotonic_ns() at startup so a
+    step of the wall clock (ntp, a gps daemon) can't fire actions twice or skip them. steps are slewed in
+    gradually instead, at most slew seconds per second'''
+    rate = 1.0 # eclipse seconds per real second
+    paused = False
+    poll = 0.1 # longest a wait sleeps (real seconds) before looking at the clock again
+    slew = 0.05 # fastest the clock may run ahead of or behind real time while it corrects, 5% by default
+    sync_interval = 1_000_000_000 # nanoseconds between comparisons with the wall clock
+
+    def __init__(self, offset=0):
+        self.offset_ns = int(offset * 1e9)
+        self.tzinfo = datetime.datetime.now(datetime.timezone.utc).astimezone().tzinfo
+        self.lock = threading.Lock()
+        self.anchor_monotonic_ns = time.monotonic_ns()
+        self.anchor_ns = time.time_ns() # wall clock at anchor_monotonic_ns
+        # (monotonic ns of the last sync, correction ns at that sync, correction ns per ns since), replaced as a whole
+        self.slewed = (self.anchor_monotonic_ns, 0, 0.0)
+        self.slewing = False
+        self.jumps = 0 # counts jumps, so waits in progress can end early
+        self.listeners = [] # threading.Events set whenever the clock jumps, pauses or changes rate
+
+    def now_ns(self):
+        '''returns now as integer nanoseconds since the epoch'''
+        mono = time.monotonic_ns()
+        if mono - self.slewed[0] >= self.sync_interval:
+            self.sync(mono)
+        return self.anchor_ns + (mono - self.anchor_monotonic_ns) + self.correction(mono) + self.offset_ns
+
+    def now(self):
+        return from_ns(self.now_ns(), self.tzinfo)
+
+    def correction(self, mono):
+        '''returns the nanoseconds of wall clock steps slewed in by monotonic time mono'''
+        since, correction, rate = self.slewed
+        return correction + int(rate * (mono - since))
+
+    def sync(self, mono):
+        '''compares the monotonic timeline with the wall clock, and ramps the correction toward it over the
+        next sync interval, never faster than slew so time keeps moving forward'''
+        if not self.lock.acquire(blocking=False):
+            return # another thread is syncing
+        try:
+            correction = self.correction(mono)
+            error = time.time_ns() - (self.anchor_ns + (mono - self.anchor_monotonic_ns) + correction)
+            rate = error / self.sync_interval
+            if abs(rate) > self.slew and not self.slewing:
+                logging.warning(f'wall clock stepped {error / 1e9:+.3f}s, slewing the eclipse clock toward it at {self.slew:.0%}')
+            self.slewing = abs(rate) > self.slew
+            self.slewed = (mono, correction, max(-self.slew, min(self.slew, rate)))
+        finally:
+            self.lock.release()
+
+    def monotonic(self):
+        '''seconds on a clock that never jumps, for measuring intervals'''
+        return time.perf_counter()
+
+    def subscribe(self, event):
+        '''event (a threading.Event) is set every time the clock jumps, pauses or changes rate'''
+        self.listeners.append(event)
+
+    def notify(self):
+        for event in self.listeners:
+            event.set()
+
+    def sleep(self, seconds):
+        '''sleeps for the given number of eclipse seconds'''
+        self.wait(None, seconds)
+
+    def wait(self, event, seconds):
+        '''waits up to seconds of eclipse time for event (a threading.Event, or None) to be set. follows
+        changes of rate and pauses, and returns early if the clock jumps. returns True if event was set'''
+        deadline = self.monotonic() + seconds
+        jumps = self.jumps
+        while event is None or not event.is_set():
+            remaining = deadline - self.monotonic()
+            if remaining <= 0 or jumps != self.jumps:
+                break
+            real = self.poll if self.paused else min(remaining / self.rate, self.poll)
+            if event is None:
+                time.sleep(real)
+            else:
+                event.wait(real)
+        return not event is None and event.is_set()
+
+    def wait_until(self, when, event=None, spin=0.001):
+        '''waits until when (nanoseconds), sleeping coarsely and then spinning for the last spin real seconds, so
+        it returns within microseconds of when rather than a sleep's millisecond of slop. returns False if event
+        (a threading.Event, or None) was set or the clock jumped first'''
+        jumps = self.jumps
+        while True:
+            if (not event is None and event.is_set()) or jumps != self.jumps:
+                return False
+            remaining = (when - self.now_ns()) / 1e9 / self.rate # real seconds
+            if not self.paused and remaining <= spin:
+                break
+            real = self.poll if self.paused else min(remaining - spin, self.poll)
+            if event is None:
+                time.sleep(real)
+            else:
+                event.wait(real)
+        while self.now_ns() < when:
+            if self.paused or jumps != self.jumps:
+                return self.wait_until(when, event, spin) if jumps == self.jumps else False
+        return True
+
+    async def wait_async(self, event, seconds):
+        '''wait() for the asyncio engine'''
+        deadline = self.monotonic() + seconds
+        jumps = self.jumps
+        while event is None or not event.is_set():
+            remaining = deadline - self.monotonic()
+            if remaining <= 0 or jumps != self.jumps:
+                break
+            await asyncio.sleep(self.poll if self.paused else min(remaining / self.rate, self.poll))
+        return not event is None and event.is_set()
+
+    def jump(self, when):
+        '''moves the clock so that now is when (a datetime or nanoseconds)'''
+        self.offset_ns += as_ns(when) - self.now_ns()
+        self.jumps += 1
+        self.notify()
+
+
+class VirtualClock(Clock):
+    '''a clock that runs rate times faster (or slower) than real time, starting from start (now by default).
+    it can be paused, resumed, sped up and jumped while it runs'''
+    def __init__(self, rate=1.0, start=None):
+        super().__init__()
+        if rate <= 0:
+            raise Exception(f'clock rate must be positive, got {rate}')
+        self.rate = float(rate)
+        self.anchor_real_ns = time.monotonic_ns()
+        self.anchor_monotonic = 0.0
+        self.anchor_ns = Clock.now_ns(self) if start is None else as_ns(start)
+
+    def elapsed_ns(self, real=None):
+        '''eclipse nanoseconds since the clock was last anchored'''
+        if self.paused:
+            return 0
+        real = time.monotonic_ns() if real is None else real
+        return int((real - self.anchor_real_ns) * self.rate)
+
+    def now_ns(self):
+        return self.anchor_ns + self.elapsed_ns()
+
+    def monotonic(self):
+        return self.anchor_monotonic + self.elapsed_ns() / 1e9
+
+    def reanchor(self):
+        '''folds the time elapsed so far into the anchors, before the rate or pause state changes'''
+        real = time.monotonic_ns()
+        elapsed = self.elapsed_ns(real)
+        self.anchor_ns += elapsed
+        self.anchor_monotonic += elapsed / 1e9
+        self.anchor_real_ns = real
+
+    def set_rate(self, rate):
+        if rate <= 0:
+            raise Exception(f'clock rate must be positive, got {rate} (use pause to stop the clock)')
+        with self.lock:
+            self.reanchor()
+            self.rate = float(rate)
+        logging.info(f'clock rate set to {self.rate:g}x')
+        self.notify()
+
+    def pause(self):
+        with self.lock:
+            self.reanchor()
+            self.paused = True
+        logging.info(f'clock paused at {self.now()}')
+        self.notify()
+
+    def resume(self):
+        with self.lock:
+            self.reanchor()
+            self.paused = False
+        logging.info(f'clock resumed at {self.now()}')
+        self.notify()
+
+    def jump(self, when):
+        with self.lock:
+            self.anchor_ns += as_ns(when) - self.now_ns()
+            self.jumps += 1
+        logging.info(f'clock jumped to {self.now()}')
+        self.notify()
+
+
+class Scheduler():
+    '''priority queue of upcoming deadlines (integer nanoseconds). sleeps until the earliest one is due, then runs its callback'''
+    def __init__(self, get_now_ns, spin=0.002, clock=None):
+        self.get_now_ns = get_now_ns
+        self.clock = Clock() if clock is None else clock # its rate and pause state scale waits
+        self.spin = spin # seconds before a deadline where we stop sleeping and spin, for sub-millisecond jitter
+        self.deadlines = [] # heap of (nanoseconds, sequence, callback, args)
+        self.lock = threading.Lock() # deadlines can be scheduled from other threads, e.g. the keyboard listener
+        self.counter = itertools.count() # breaks ties so callbacks are never compared
+        self.wakeup = threading.Event() # set when a new deadline is added, so a sleeping wait is re-evaluated
+        self.clock.subscribe(self.wakeup) # and when the clock jumps, pauses or changes rate
+
+    def schedule(self, when, callback, *args):
+        '''runs callback(*args, when) once when (a datetime or nanoseconds) is reached'''
+        when = as_ns(when)
+        with self.lock:
+            heapq.heappush(self.deadlines, (when, next(self.counter), callback, args))
+        self.wakeup.set()
+
+    def clear(self):
+        '''drops every pending deadline'''
+        with self.lock:
+            self.deadlines = []
+        self.wakeup.set()
+
+    def next_deadline(self):
+        '''returns the next deadline in nanoseconds, None if nothing is scheduled'''
+        with self.lock:
+            if not self.deadlines:
+                return None
+            return self.deadlines[0][0]
+
+    def wait_until(self, when):
+        '''sleeps coarsely until just before when, then spins the remainder. returns False if woken early by a
+        new deadline or a change to the clock, or if the clock is paused. wakeup is cleared by the caller, before
+        it reads when from the heap'''
+        while True:
+            if self.clock.paused:
+                self.wakeup.wait(self.clock.poll)
+                return False
+            remaining = (when - self.get_now_ns()) / 1e9 / self.clock.rate # real seconds
+            if remaining <= self.spin:
+                break
+            if self.wakeup.wait(remaining - self.spin):
+                return False
+        while self.get_now_ns() < when:
+            if self.clock.paused:
+                return False
+        return True
+
+    def run_next(self, max_wait=1.0):
+        '''waits for the next deadline and runs every callback that is due. waits at most max_wait real seconds'''
+        self.wakeup.clear() # before reading the head, so a deadline scheduled from now on still wakes the wait
+        when = self.next_deadline()
+        if when is None:
+            self.wakeup.wait(max_wait)
+            return
+        limit = self.get_now_ns() + int(max_wait * self.clock.rate * 1e9)
+        if when > limit:
+            self.wait_until(limit)
+            return
+        if not self.wait_until(when):
+            return # something earlier may have been scheduled, re-evaluate
+        now = self.get_now_ns()
+        while True:
+            with self.lock:
+                if not self.deadlines or self.deadlines[0][0] > now:
+                    break
+                when, _, callback, args = heapq.heappop(self.deadlines)
+            callback(*args, when)
+
+
+class StartupTimer():
+    '''records how long each phase of startup takes, and when milestones like the first dispatch were reached,
+    so slow restarts can be tracked down. start is a time.perf_counter(), import_start to include the imports'''
+    def __init__(self, start=None):
+        self.start = time.perf_counter() if start is None else start
+        self.phases = [] # (name, seconds) in the order they finished
+        self.marks = [] # (name, seconds since start) in the order they were reached
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name, seconds):
+        self.phases.append((name, seconds))
+
+    def mark(self, name):
+        '''records that the milestone name was reached now, returns the seconds since start'''
+        seconds = time.perf_counter() - self.start
+        self.marks.append((name, seconds))
+        return seconds
+
+    def report(self):
+        '''returns a multi-line breakdown of the startup time. its total is up to the main loop being ready, not
+        the rest of the run, however late it's reported'''
+        ready = dict(self.marks).get('ready')
+        lines = [f'{name:<40} {seconds:8.3f}s' for name, seconds in self.phases]
+        if ready is None:
+            lines.append(f'{"startup so far":<40} {time.perf_counter() - self.start:8.3f}s')
+        else:
+            lines.append(f'{"startup total (until ready)":<40} {ready:8.3f}s')
+        lines.extend(f'{name + " after":<40} {seconds:8.3f}s' for name, seconds in self.marks)
+        return '\n'.join(lines)
+
+
+class FrameRecorder():
+    '''ring buffer of per-frame timestamps (eclipse clock nanoseconds) for each stage a trigger goes through,
+    from its planned instant to the capture returning. one row per frame, stored as numpy columns, with the
+    oldest rows overwritten once capacity is reached. exported at exit, see export'''
+    stages = ('planned', 'dispatched', 'dequeued', 'shutter_set', 'trigger_sent', 'captured')
+    outcomes = ('queued', 'done', 'dropped', 'merged', 'failed')
+    # latencies summarised at exit: name, from stage, to stage, whether continuous frames after the first count
+    metrics = (('dispatch', 'planned', 'dispatched', False), ('queue', 'dispatched', 'dequeued', False),
+        ('shutter', 'dequeued', 'shutter_set', False), ('trigger', 'planned', 'trigger_sent', False),
+        ('capture', 'trigger_sent', 'captured', True))
+
+    def __init__(self, capacity=65536):
+        self.capacity = capacity
+        self.count = 0 # rows ever started, the next row number
+        self.lock = threading.Lock()
+        self.columns = {stage: np.zeros(capacity, dtype=np.int64) for stage in self.stages} # 0 where a stage wasn't reached
+        self.columns['camera'] = np.zeros(capacity, dtype=np.int16) # index into self.cameras
+        self.columns['action'] = np.zeros(capacity, dtype=np.int32) # index into self.actions
+        self.columns['frame'] = np.zeros(capacity, dtype=np.int32) # frame number within a dispatch, for continuous captures
+        self.columns['outcome'] = np.zeros(capacity, dtype=np.int8) # index into outcomes
+        self.cameras = [] # camera ids
+        self.actions = [] # action labels
+        self.indexes = {} # (camera id or id(action)) -> index
+
+    def index(self, key, names, name):
+        if not key in self.indexes:
+            self.indexes[key] = len(names)
+            names.append(name)
+        return self.indexes[key]
+
+    def start(self, cam_id, action, planned, dispatched):
+        '''starts a row for a dispatched trigger, returns its row number'''
+        with self.lock:
+            row = self.count
+            self.count += 1
+            i = row % self.capacity
+            for stage in self.stages:
+                self.columns[stage][i] = 0
+            self.columns['camera'][i] = self.index(('camera', cam_id), self.cameras, str(cam_id))
+            label = f'{action.text} @ {action.time:%H:%M:%S}' if not action.time is None else str(action.text)
+            self.columns['action'][i] = self.index(id(action), self.actions, label)
+            self.columns['frame'][i] = 0
+            self.columns['outcome'][i] = 0
+            self.columns['planned'][i] = planned
+            self.columns['dispatched'][i] = dispatched
+        return row
+
+    def next_frame(self, row):
+        '''starts a row for another frame of the same dispatch (a continuous capture), returns its row number'''
+        with self.lock:
+            if self.count - row > self.capacity:
+                return None # already overwritten
+            new = self.count
+            self.count += 1
+            src, i = row % self.capacity, new % self.capacity
+            for column in self.columns.values():
+                column[i] = column[src]
+            self.columns['frame'][i] += 1
+            self.columns['outcome'][i] = 0
+            self.columns['trigger_sent'][i] = 0
+            self.columns['captured'][i] = 0
+        return new
+
+    def stamp(self, row, stage, ns):
+        '''records ns as the stage of row, under the lock so a row being recycled by next_frame isn't stamped'''
+        if row is None:
+            return
+        with self.lock:
+            if self.count - row > self.capacity:
+                return # already overwritten
+            self.columns[stage][row % self.capacity] = ns
+
+    def set_outcome(self, row, outcome):
+        if row is None:
+            return
+        with self.lock:
+            if self.count - row > self.capacity:
+                return
+            self.columns['outcome'][row % self.capacity] = self.outcomes.index(outcome)
+
+    def rows(self):
+        '''returns the columns of every row still held, oldest first'''
+        with self.lock:
+            n = min(self.count, self.capacity)
+            order = (np.arange(n) + self.count - n) % self.capacity
+            return {name: column[order] for name, column in self.columns.items()}
+
+    def summary(self):
+        '''returns (camera, action, metric, count, p50, p95, p99) rows in milliseconds, per camera (action '*')
+        and per camera and action'''
+        rows = self.rows()
+        result = []
+        for c, cam_id in enumerate(self.cameras):
+            on_camera = rows['camera'] == c
+            groups = [('*', on_camera)]
+            groups += [(self.actions[a], on_camera & (rows['action'] == a)) for a in np.unique(rows['action'][on_camera])]
+            for label, group in groups:
+                for metric, start, end, every_frame in self.metrics:
+                    mask = group & (rows[start] != 0) & (rows[end] != 0)
+                    if not every_frame:
+                        mask &= rows['frame'] == 0
+                    if not mask.any():
+                        continue
+                    latency = (rows[end][mask] - rows[start][mask]) / 1e6
+                    p50, p95, p99 = np.percentile(latency, [50, 95, 99])
+                    result.append((cam_id, label, metric, int(mask.sum()), p50, p95, p99))
+        return result
+
+    def export(self, path=None):
+        '''writes every row to a .npz (one array per column, plus the camera and action names) and the
+        summary to a .csv next to it. returns the path of the .npz'''
+        if path is None:
+            path = f'frames-{datetime.datetime.now():%Y%m%d-%H%M%S}.npz'
+        rows = self.rows()
+        np.savez_compressed(path, cameras=np.array(self.cameras), actions=np.array(self.actions),
+            outcomes=np.array(self.outcomes), **rows)
+        summary = self.summary()
+        with open(os.path.splitext(path)[0] + '.csv', 'w') as file:
+            file.write('camera,action,metric,count,p50_ms,p95_ms,p99_ms\n')
+            for cam_id, label, metric, n, p50, p95, p99 in summary:
+                file.write(f'"{cam_id}","{label}",{metric},{n},{p50:.3f},{p95:.3f},{p99:.3f}\n')
+        logging.info(f'wrote {len(rows["planned"])} frame timings to {path}')
+        self.report(summary)
+        return path
+
+    def report(self, summary=None):
+        '''logs the latency per camera'''
+        summary = self.summary() if summary is None else summary
+        lines = [f'{cam_id[:24]:<24} {metric:<8} {n:>6} {p50:9.1f} {p95:9.1f} {p99:9.1f}' for cam_id, label, metric, n, p50, p95, p99 in summary if label == '*']
+        logging.info(f'frame latency per camera (ms):\n'
+            + f'{"camera":<24} {"metric":<8} {"count":>6} {"p50":>9} {"p95":>9} {"p99":>9}\n' + '\n'.join(lines))
+
+
 class Timeholder():
     '''parses the json, determines times, and handles event and datetime objects'''
     local_tz = None # used to hold local timezone information
 
-    def __init__(self, jsonfile, offset=0):
-        self.offset = offset # time offset used to emulate an eclipse
+    def __init__(self, jsonfile, offset=0, clock=None, plan_cache=False):
+        self.clock = Clock(offset) if clock is None else clock # offset is used to emulate an eclipse
         self.phases = None
         self.events = None
         self.voice_actions = None
-
-        json_obj = self.parse_json(jsonfile)
+        self.timelines = None # compiled trigger timelines, when loaded from the plan cache
+        self.plan_cache = PlanCache(jsonfile) if plan_cache is True else None
+        self.plan_key = None
+        self.plan_dated = False # whether any action time was parsed onto today's date
+
+        raw = self.read_json(jsonfile)
+        if not self.plan_cache is None:
+            self.plan_key = self.plan_cache.key(raw, self.get_local_tz())
+            plan = self.plan_cache.load(self.plan_key)
+            if not plan is None:
+                self.load_plan(plan)
+                return
+        json_obj = json.loads(raw)
         self.build_events(json_obj)
         self.build_phases(json_obj)
         self.build_actions(json_obj)
-        self.json_obj = json_obj
+        names = set(e.name for e in self.events.get_events())
+        self.plan_dated = any('time' in a and not a['time'] in names for a in json_obj.get('camera_actions', []) + json_obj.get('voice_actions', []))
+        # the action lists are held as objects now, keeping their json too would double the memory of long sequences
+        self.json_obj = {key: value for key, value in json_obj.items() if not key in ('camera_actions', 'voice_actions')}
+
+    def load_plan(self, plan):
+        '''takes the events, phases, actions and timelines from a cached plan, see PlanCache'''
+        self.events = plan['events']
+        self.phases = plan['phases']
+        self.camera_actions = plan['camera_actions']
+        self.voice_actions = plan['voice_actions']
+        self.timelines = plan['timelines']
+        self.json_obj = plan['json_obj']
+        self.camera_actions.bind(self.get_now, self.get_now_ns)
+        self.voice_actions.bind(self.get_now, self.get_now_ns)
+
+    def save_plan(self, timelines):
+        '''writes the parsed plan and its compiled timelines to the plan cache, if it is enabled'''
+        if self.plan_cache is None or not self.timelines is None:
+            return # disabled, or the plan came from the cache
+        self.plan_cache.save(self.plan_key, {'events': self.events, 'phases': self.phases, 'camera_actions': self.camera_actions,
+            'voice_actions': self.voice_actions, 'timelines': timelines, 'json_obj': self.json_obj}, dated=self.plan_dated)
     
     def start_test(self, event='c2', offset=-75):
         '''sets the offset so an *eclipse* starts. c2 offset is how many seconds relative to c2 the test starts'''
-        self.offset = self.events.get(event) - self.get_now() + int(offset)
+        self.clock.jump(self.events.get(event) + int(offset))
 
     def get_voice_actions(self):
         '''returns a list of any voice action objects that are occurring right now'''
@@ -321,16 +1090,19 @@ class Timeholder():
 
     def get_now(self):
         '''returns now. may change in the future so use this'''
-        return datetime.datetime.now(datetime.timezone.utc).astimezone() + datetime.timedelta(seconds=self.offset)
+        return self.clock.now()
+
+    def get_now_ns(self):
+        '''returns now as integer nanoseconds since the epoch, for comparisons in the main loop'''
+        return self.clock.now_ns()
 
-    def parse_json(self, jsonfile):
-        # parse the event_times json object
+    def read_json(self, jsonfile):
+        '''returns the bytes of the json file'''
         if not os.path.exists(jsonfile):
             logging.error(f'{jsonfile} does not exist! Exiting.')
             raise Exception(f'{jsonfile} does not exist! Exiting.')
-        with open(jsonfile, 'r') as file:
-            json_obj = json.load(file)
-        return json_obj
+        with open(jsonfile, 'rb') as file:
+            return file.read()
 
     def build_events(self, json_obj):
         self.events = Events(json_obj, self.get_local_tz())
@@ -339,8 +1111,8 @@ class Timeholder():
         self.phases = Phases(json_obj, self.events)
 
     def build_actions(self, json_obj):
-        self.camera_actions = CameraActions(json_obj, self.events, self.get_now)
-        self.voice_actions = VoiceActions(json_obj, self.events, self.get_now)
+        self.camera_actions = CameraActions(json_obj, self.events, self.get_now, self.get_now_ns)
+        self.voice_actions = VoiceActions(json_obj, self.events, self.get_now, self.get_now_ns)
 
     def get_local_tz(self):
         '''returns the local timezone, saves as class object (referenced outside class)'''
@@ -371,6 +1143,146 @@ class Timeholder():
         return self.phases.get(self.get_now())
 
 
+class PlanCache():
+    '''binary cache of a parsed plan (contact times, phases, camera and voice actions with their absolute trigger times,
+    and the per-camera timelines with their resolved camera ids), stored next to the json as <name>.plan so a restart
+    can skip parsing. it is keyed by a hash of the json, the local timezone its contact times are resolved in, this
+    script and the name it's imported under, so editing any of them rebuilds it. the pickled actions refer to their
+    classes by module, so a plan written by benchmark.py (run.*) isn't loaded by ./run.py (__main__.*), which would
+    import the script a second time. the key is pickled ahead of the plan and checked before the plan is unpickled.
+    plans with clock times parsed onto today's date expire at midnight'''
+    def __init__(self, jsonfile):
+        self.path = os.path.splitext(jsonfile)[0] + '.plan'
+
+    def key(self, raw, tzinfo):
+        digest = hashlib.sha256(raw)
+        digest.update(str(tzinfo).encode())
+        digest.update(__name__.encode()) # the module the pickled classes are looked up in
+        with open(__file__, 'rb') as file:
+            digest.update(file.read()) # pickled classes must match the code loading them
+        return digest.hexdigest()
+
+    def load(self, key):
+        '''returns the cached plan if it was built with key (and today, if it depends on the date), otherwise None'''
+        gc.disable() # the collector would otherwise run over and over while the actions are created
+        try:
+            with open(self.path, 'rb') as file:
+                header = pickle.load(file) # plain types only, so reading it never imports anything
+                if not isinstance(header, dict) or header.get('key') != key or not header.get('date') in (None, str(datetime.date.today())):
+                    logging.info(f'plan cache {self.path} is out of date, rebuilding it')
+                    return None
+                plan = pickle.load(file)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logging.warning(f'unable to read plan cache {self.path}, rebuilding it: {e}')
+            return None
+        finally:
+            gc.enable()
+        logging.info(f'loaded plan from cache {self.path}')
+        return plan
+
+    def save(self, key, plan, dated=False):
+        '''writes the plan. dated plans hold clock times parsed onto today's date, and are only used today'''
+        temp = self.path + '.tmp'
+        try:
+            with open(temp, 'wb') as file:
+                pickle.dump({'key': key, 'date': str(datetime.date.today()) if dated else None}, file, protocol=pickle.HIGHEST_PROTOCOL)
+                pickle.dump(plan, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp, self.path) # a crash while writing leaves the old cache in place
+        except (OSError, pickle.PicklingError) as e:
+            logging.warning(f'unable to write plan cache {self.path}: {e}')
+            return
+        logging.info(f'wrote plan cache {self.path}')
+
+
+class CameraProfile():
+    '''measured latencies of each camera, written next to the json as <name>.profile by --calibrate and loaded by
+    later runs. for each camera_id it holds the connection its frames are triggered over, latency percentiles (real
+    seconds) of a shutter change, of a capture over usb and over serial and of a shutter change sent with a usb
+    capture, and the frames per second each connection sustained back to back'''
+    samples = 10 # shutter changes and single captures timed per camera
+    duration = 5.0 # seconds of back to back captures timed per connection
+
+    def __init__(self, jsonfile):
+        self.path = os.path.splitext(jsonfile)[0] + '.profile'
+        self.cameras = {} # camera_id: measurements, see Camera.calibrate
+        self.created = None # when it was calibrated
+
+    def load(self):
+        '''reads the profile, returns True if there was one'''
+        try:
+            with open(self.path) as file:
+                saved = json.load(file)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as e:
+            logging.warning(f'unable to read camera profile {self.path}: {e}')
+            return False
+        self.cameras = saved.get('cameras', {})
+        self.created = saved.get('created')
+        logging.info(f'loaded camera profile {self.path}, calibrated {self.created}')
+        return True
+
+    def save(self):
+        temp = self.path + '.tmp'
+        with open(temp, 'w') as file:
+            json.dump({'created': self.created, 'cameras': self.cameras}, file, indent=1)
+        os.replace(temp, self.path)
+        logging.info(f'wrote camera profile {self.path}')
+
+    def get(self, camera_id):
+        return self.cameras.get(camera_id, {})
+
+    def simulation(self, camera_id):
+        '''returns a SimulatedGphotoSession latency model for the camera from its measurements, so rehearsals run at its real pace'''
+        measured = self.get(camera_id)
+        capture, shutter, batched = measured.get('capture', {}).get('usb'), measured.get('shutter'), measured.get('batched')
+        model = {}
+        if not capture is None:
+            model['capture'] = capture['mean']
+            model['jitter'] = round((capture['p95'] - capture['p50']) / 1.645, 4) # as if normally distributed
+        if not shutter is None:
+            model['set_config'] = shutter['mean']
+        if not capture is None and not shutter is None and not batched is None:
+            model['round_trip'] = round(max(0.0, capture['mean'] + shutter['mean'] - batched['mean']), 4) # what batching saved
+        return model
+
+    @staticmethod
+    def stats(seconds):
+        '''returns the count, mean and percentiles of a list of latencies in seconds, None if it's empty'''
+        if len(seconds) == 0:
+            return None
+        p50, p95, p99 = np.percentile(seconds, [50, 95, 99])
+        return {'n': len(seconds), 'mean': round(float(np.mean(seconds)), 4), 'p50': round(float(p50), 4),
+            'p95': round(float(p95), 4), 'p99': round(float(p99), 4), 'max': round(float(np.max(seconds)), 4)}
+
+    def report(self):
+        '''returns a table of every camera's measurements, in milliseconds'''
+        def ms(stats):
+            return '-' if stats is None else f'{stats["p50"] * 1e3:.0f}/{stats["p95"] * 1e3:.0f}'
+        def fps(value):
+            return '-' if value is None else f'{value:.2f}'
+        lines = [f'{"camera":<24} {"trigger":<7} {"shutter":>9} {"usb":>9} {"serial":>9} {"batched":>9} {"usb fps":>8} {"serial fps":>10}']
+        for camera_id, measured in self.cameras.items():
+            capture, sustained = measured.get('capture', {}), measured.get('fps', {})
+            lines.append(f'{camera_id:<24} {measured.get("connection"):<7} {ms(measured.get("shutter")):>9} {ms(capture.get("usb")):>9} '
+                f'{ms(capture.get("serial")):>9} {ms(measured.get("batched")):>9} {fps(sustained.get("usb")):>8} {fps(sustained.get("serial")):>10}')
+        return '\n'.join(lines) + '\nlatencies are p50/p95 milliseconds'
+
+
+def calibrate(inputfile, simulate=False, simulation=None):
+    '''measures every camera in inputfile (see Camera.calibrate) and writes their profile next to it, returns the CameraProfile'''
+    with open(inputfile) as file:
+        json_obj = json.load(file)
+    profile = CameraProfile(inputfile)
+    dispatcher = CameraDispatch(json_obj, simulate=simulate, simulation=simulation)
+    profile.cameras = dispatcher.calibrate(profile.samples, profile.duration)
+    profile.created = datetime.datetime.now().astimezone().isoformat()
+    profile.save()
+    return profile
+
+
 class Events():
     '''holds event objects'''
     def __init__(self, json_obj, tzinfo):
@@ -380,6 +1292,9 @@ class Events():
         # parse the json dict and create events
         for ev in events_list:
             self.events.append(Event(ev, tzinfo))
+        self.names = {}
+        for e in self.events:
+            self.names.setdefault(e.name, e) # looked up for every action, first one wins like the scan did
 
     def get_events(self):
         return self.events
@@ -388,10 +1303,11 @@ class Events():
         return min([e for e in self.events if e >= now], default=None)
 
     def get(self, name):
-        return next((e for e in self.events if e == name), None)
+        return self.names.get(name) if isinstance(name, str) else None
 
     def get_time(self, name):
-        return next((e.time for e in self.events if e == name), None)
+        event = self.get(name)
+        return None if event is None else event.time
 
     def is_post_eclipse(self, now):
         '''returns True if eclipse is over, False otherwise'''
@@ -402,6 +1318,7 @@ class Event():
     def __init__(self, event_dict, tzinfo):
         self.name = event_dict.get('name', 'unknown')
         self.time = self.parse_time(event_dict, tzinfo)
+        self.time_ns = to_ns(self.time) # comparisons are done on integer nanoseconds
         self.text = event_dict.get('text', 'unknown')
         logging.info(f'parsed time of event {self.text}: {self.time}')
 
@@ -428,11 +1345,10 @@ class Event():
         return self.time
 
     def __eq__(self, other):
-        '''if other is a datetime object, does a comparison'''
-        if isinstance(other, datetime.datetime):
-            if self - other <= 0 and self - other > -1:
-                return True
-            return False
+        '''if other is a datetime object (or nanoseconds), does a comparison'''
+        if isinstance(other, (datetime.datetime, int)):
+            dt = self.time_ns - as_ns(other)
+            return dt <= 0 and dt > -1_000_000_000
         if isinstance(other, str):
             if self.name == other:
                 return True
@@ -440,35 +1356,35 @@ class Event():
         return NotImplemented
 
     def __gt__(self, other):
-        '''if other is a datetime object, does a comparison'''
-        if isinstance(other, datetime.datetime):
-            return self.time > other
+        '''if other is a datetime object (or nanoseconds), does a comparison'''
+        if isinstance(other, (datetime.datetime, int)):
+            return self.time_ns > as_ns(other)
         if isinstance(other, Event):
-            return self.time > other.time
+            return self.time_ns > other.time_ns
         return NotImplemented
 
     def __lt__(self, other):
-        '''if other is a datetime object, does a comparison'''
-        if isinstance(other, datetime.datetime):
-            return self.time < other
+        '''if other is a datetime object (or nanoseconds), does a comparison'''
+        if isinstance(other, (datetime.datetime, int)):
+            return self.time_ns < as_ns(other)
         if isinstance(other, Event):
-            return self.time < other.time
+            return self.time_ns < other.time_ns
         return NotImplemented
 
     def __ge__(self, other):
-        '''if other is a datetime object, does a comparison'''
-        if isinstance(other, datetime.datetime):
-            return self.time >= other
+        '''if other is a datetime object (or nanoseconds), does a comparison'''
+        if isinstance(other, (datetime.datetime, int)):
+            return self.time_ns >= as_ns(other)
         if isinstance(other, Event):
-            return self.time >= other.time
+            return self.time_ns >= other.time_ns
         return NotImplemented
 
     def __le__(self, other):
-        '''if other is a datetime object, does a comparison'''
-        if isinstance(other, datetime.datetime):
-            return self.time <= other
+        '''if other is a datetime object (or nanoseconds), does a comparison'''
+        if isinstance(other, (datetime.datetime, int)):
+            return self.time_ns <= as_ns(other)
         if isinstance(other, Event):
-            return self.time <= other.time
+            return self.time_ns <= other.time_ns
         return NotImplemented
 
     def __sub__(self, other):
@@ -523,34 +1439,38 @@ class Phase():
         self.start = events.get_time(dct.get('start', None)) # returns None if it doesn't exist
         self.end = events.get_time(dct.get('end', None)) # returns None if it doesn't exist
         self.time = self.start # so everything has an associated time
+        self.start_ns = None if self.start is None else to_ns(self.start)
+        self.end_ns = None if self.end is None else to_ns(self.end)
 
     def get(self, now):
         return next((e for e in self.events if e == now), None)
 
     def __gt__(self, other):
-        if isinstance(other, datetime.datetime):
-            if self.start is None:
+        if isinstance(other, (datetime.datetime, int)):
+            other = as_ns(other)
+            if self.start_ns is None:
                 return False
-            if not self.end is None and self.end < other:
+            if not self.end_ns is None and self.end_ns < other:
                 return False
-            return self.start > other
+            return self.start_ns > other
         if isinstance(other, Phase):
-            return self.start > other.start
+            return self.start_ns > other.start_ns
         return NotImplemented
 
     def __lt__(self, other):
-        if isinstance(other, datetime.datetime):
-            if self.end is False:
+        if isinstance(other, (datetime.datetime, int)):
+            if self.end_ns is None:
                 return False
-            return self.end < other
+            return self.end_ns < as_ns(other)
         if isinstance(other, Phase):
-            return self.start < other.start
+            return self.start_ns < other.start_ns
         return NotImplemented
 
     def __eq__(self, other):
-        if isinstance(other, datetime.datetime):
-            if self.start is None or self.start <= other:
-                if self.end is None or self.end >= other:
+        if isinstance(other, (datetime.datetime, int)):
+            other = as_ns(other)
+            if self.start_ns is None or self.start_ns <= other:
+                if self.end_ns is None or self.end_ns >= other:
                     return True
             return False
         return NotImplemented
@@ -563,16 +1483,26 @@ class Phase():
 
 
 class Action():
-    '''represents an action, such as a voice or shutter event taken at a given time or for a given duration'''
-    def __init__(self, dct, events, get_now):
+    '''represents an action, such as a voice or shutter event taken at a given time or for a given duration.
+    slotted, as generated sequences can hold a hundred thousand of them'''
+    __slots__ = ('time', 'start', 'end', 'text', 'name', 'get_now', 'get_now_ns', 'allowable', 'time_ns', 'start_ns', 'end_ns')
+
+    def __init__(self, dct, events, get_now, get_now_ns=None):
         self.time = None
         self.start = None
         self.end = None
         self.text = None
         self.get_now = get_now # give access to parent method
+        self.get_now_ns = (lambda: to_ns(get_now())) if get_now_ns is None else get_now_ns
         self.allowable = True # whether the action is allowed to be dispatched
         self.load_from_json(dct, events) # creates the action object from the json and events, filling the params above
 
+    def __getstate__(self):
+        '''pickled without get_now and get_now_ns, which are bound again on load (see PlanCache). the state is
+        (None, slots) so unpickling sets the slots without a python __setstate__'''
+        names = itertools.chain.from_iterable(getattr(cls, '__slots__', ()) for cls in type(self).__mro__)
+        return None, {name: getattr(self, name) for name in names if not name in ('get_now', 'get_now_ns') and hasattr(self, name)}
+
     def load_from_json(self, dct, events):
         '''loads an event from the json, parsing times and setting values'''
         # determine time
@@ -589,56 +1519,76 @@ class Action():
         self.name = dct.get('name', None)
         if self.time is None and not self.start is None:
             self.time = self.start
+        # integer nanosecond copies, which every comparison uses
+        self.time_ns = None if self.time is None else to_ns(self.time)
+        self.start_ns = None if self.start is None else to_ns(self.start)
+        self.end_ns = None if self.end is None else to_ns(self.end)
+        if not self.start_ns is None and not self.end_ns is None and self.end_ns < self.start_ns:
+            logging.error(f'action "{self.text}" ends ({self.end}) before it starts ({self.start})')
+            raise Exception(f'action "{self.text}" ends ({self.end}) before it starts ({self.start})')
 
     def parse_time(self, tm, events):
         '''returns a datetime associated with the given tm string, could be an event (like "c2") or a normal datetime object
             uses tzinfo from the events object'''
-        if tm in (e.name for e in events.get_events()):
-            return next((e.time for e in events.get_events() if e.name == tm), None)
+        event_time = events.get_time(tm)
+        if not event_time is None:
+            return event_time
         try:
             return parser.parse(tm, default=datetime.datetime.now()).replace(tzinfo=events.tzinfo)
         except ValueError:
             raise Exception(f'unable to parse: {tm}')
 
+    def span(self):
+        '''returns (lo, hi) nanoseconds bounding every instant the action can compare equal to, None where unbounded'''
+        if not self.time_ns is None:
+            return self.time_ns, self.time_ns + 1_000_000_000
+        return self.start_ns, self.end_ns
+
+    def next_trigger(self, now, after=False):
+        '''returns the nanoseconds the action should be dispatched at (now if it is already due), or None if it has passed.
+        now is a datetime or nanoseconds'''
+        now = as_ns(now)
+        if after is True or self.time_ns is None or self.time_ns < now - 1_000_000_000:
+            return None
+        return max(self.time_ns, now)
+
     def __eq__(self, other):
-        '''if the current time is within a second of the input datetime, or passed, return True'''
-        if isinstance(other, datetime.datetime):
-            if not self.time is None:
-                if self - other<= 0 and self - other > -1:
-                    return True
-                return False
-            if not self.start is None and not self.end is None: # event with a start and end time
-                if other >= self.start and other <= self.end:
-                    return True
-                return False
+        '''if the current time is within a second of the input datetime (or nanoseconds), or passed, return True'''
+        if isinstance(other, (datetime.datetime, int)):
+            other = as_ns(other)
+            if not self.time_ns is None:
+                dt = self.time_ns - other
+                return dt <= 0 and dt > -1_000_000_000
+            if not self.start_ns is None and not self.end_ns is None: # event with a start and end time
+                return self.start_ns <= other <= self.end_ns
         return NotImplemented
 
     def __gt__(self, other):
-        '''if other is a datetime object, does a comparison'''
-        if isinstance(other, datetime.datetime):
-            return self.time > other
+        '''if other is a datetime object (or nanoseconds), does a comparison'''
+        if isinstance(other, (datetime.datetime, int)):
+            return self.time_ns > as_ns(other)
         if isinstance(other, Event) or isinstance(other, Action) or isinstance(other, Phase):
             return self.time > other.time
         return NotImplemented
 
     def __lt__(self, other):
-        '''if other is a datetime object, does a comparison'''
-        if isinstance(other, datetime.datetime):
-            return self.time < other
+        '''if other is a datetime object (or nanoseconds), does a comparison'''
+        if isinstance(other, (datetime.datetime, int)):
+            return self.time_ns < as_ns(other)
         if isinstance(other, Event) or isinstance(other, Action) or isinstance(other, Phase):
             return self.time < other.time
         return NotImplemented
 
     def __ge__(self, other):
-        if isinstance(other, datetime.datetime):
-            return self.time >= other
+        if isinstance(other, (datetime.datetime, int)):
+            return self.time_ns >= as_ns(other)
         if isinstance(other, Event) or isinstance(other, Action) or isinstance(other, Phase):
             return self.time >= other.time
         return NotImplemented
 
     def __le__(self, other):
-        if isinstance(other, datetime.datetime):
-            return self.time <= other
+        if isinstance(other, (datetime.datetime, int)):
+            return self.time_ns <= as_ns(other)
         if isinstance(other, Event) or isinstance(other, Action) or isinstance(other, Phase):
             return self.time <= other.time
         return NotImplemented
@@ -665,26 +1615,51 @@ class Action():
 
 
 class VoiceActions():
-    '''holds voice action objects'''
-    def __init__(self, json_obj, events, get_now):
+    '''holds voice action objects, indexed by time (see ActionIndex). played actions are marked rather than removed'''
+    def __init__(self, json_obj, events, get_now, get_now_ns=None):
         '''create a list of voice action objects from the json and save it to the instance'''
-        self.actions = [VoiceAction(va, events, get_now) for va in json_obj.get('voice_actions', {})]
+        self.all = [VoiceAction(va, events, get_now, get_now_ns) for va in json_obj.get('voice_actions', {})]
+        self.index = ActionIndex(self.all)
+        self.pending = np.ones(len(self.all), dtype=bool) # False once played
         self.get_now = get_now
 
+    def __getstate__(self):
+        return {key: value for key, value in self.__dict__.items() if key != 'get_now'}
+
+    def bind(self, get_now, get_now_ns):
+        '''gives actions loaded from the plan cache their clock'''
+        self.get_now = get_now
+        for action in self.all:
+            action.get_now, action.get_now_ns = get_now, get_now_ns
+
+    @property
+    def actions(self):
+        '''the voice actions that haven't been played'''
+        return [a for a, pending in zip(self.all, self.pending) if pending]
+
     def get_next_action(self, now):
-        return min([a for a in self.actions if a > now], default=None)
+        for i in self.index.after(now):
+            if self.pending[i]:
+                return self.all[i]
+        return None
+
+    def remove(self, action):
+        '''removes an action that has been played'''
+        self.pending[self.index.position(action)] = False
 
     def get(self, now):
         '''gets any current voice action, returns it, and removes it from the list'''
-        submitting = [a for a in self.actions if a == now]
-        self.actions = [a for a in self.actions if a not in submitting]
-        return submitting
+        submitting = [i for i in self.index.at(now) if self.pending[i] and self.all[i] == now]
+        self.pending[submitting] = False
+        return [self.all[i] for i in submitting]
 
 
 class VoiceAction(Action):
     '''class for a voice action, inherits from Action class'''
-    def __init__(self, dct, events, get_now):
-        super().__init__(dct, events, get_now)
+    __slots__ = ('voice',)
+
+    def __init__(self, dct, events, get_now, get_now_ns=None):
+        super().__init__(dct, events, get_now, get_now_ns)
         self.voice = dct.get('voice', None)
 
     def play(self):
@@ -693,59 +1668,111 @@ class VoiceAction(Action):
 
 
 class CameraActions():
-    '''holds camera action objects'''
-    def __init__(self, dct, events, get_now):
+    '''holds camera action objects, indexed by time (see ActionIndex)'''
+    log_limit = 1000 # longer sequences are summarised in the log rather than listed action by action
+
+    def __init__(self, dct, events, get_now, get_now_ns=None):
         '''create a list of camera action objects from the json and save it to the instance'''
         self.get_now = get_now
-        self.actions = [CameraAction(ca, events, get_now) for ca in dct.get('camera_actions', {})]
+        self.actions = [CameraAction(ca, events, get_now, get_now_ns) for ca in dct.get('camera_actions', {})]
+        self.index = ActionIndex(self.actions)
+        if len(self.actions) <= self.log_limit:
+            for action in self.actions:
+                logging.info(f'Parsed Camera Action w/ {action.describe()}')
+        else:
+            cameras = collections.Counter(a.camera_id for a in self.actions)
+            logging.info(f'Parsed {len(self.actions)} Camera Actions, per camera_id: {dict(cameras)}')
+
+    def __getstate__(self):
+        return {key: value for key, value in self.__dict__.items() if key != 'get_now'}
+
+    def bind(self, get_now, get_now_ns):
+        '''gives actions loaded from the plan cache their clock'''
+        self.get_now = get_now
+        for action in self.actions:
+            action.get_now, action.get_now_ns = get_now, get_now_ns
 
     def get_next_action(self, now):
-        return min([a for a in self.actions if a > now], default=None)
+        return next((self.actions[i] for i in self.index.after(now)), None)
 
     def get_next_n_actions(self, now, n):
-        future_actions = sorted([a for a in self.actions if a.time > now], key=lambda a: a.time)
-        return future_actions[:n]
+        return [self.actions[i] for i in itertools.islice(self.index.after(now), n)]
+
+    def build_timelines(self, get_camera_id, events):
+        '''compiles the actions into a sorted TriggerTimeline per camera, returns a dict of camera_id: timeline'''
+        times = [e.time_ns for e in events.get_events() if not e.time is None]
+        first, last = min(times), max(times) # bounds for actions without a start or end
+        grouped = {}
+        for action in self.actions:
+            grouped.setdefault(get_camera_id(action), []).append(action)
+        return {cam_id: TriggerTimeline(actions, first, last) for cam_id, actions in grouped.items()}
 
     def get(self, now):
         '''gets any current camera action (doesn't remove them like voice actions)'''
-        return [ca for ca in self.actions if ca == now]
+        return [self.actions[i] for i in self.index.at(now) if self.actions[i] == now]
 
     def get_allowable(self, now):
         '''gets any current camera action that isn't currently being processed'''
-        return [ca for ca in self.actions if ca == now and ca.allowable == True]
+        return [ca for ca in self.get(now) if ca.allowable == True]
 
     def get_current(self, now):
         '''only used to show actions in the current panel, to include jobs intermittently submitted'''
-        return [ca for ca in self.actions if ca.is_current(now)]
+        return [self.actions[i] for i in self.index.at(now) if self.actions[i].is_current(now)]
 
 class CameraAction(Action):
     '''class for a camera action, (represent a desired photograph, shutter duration, or action with associated timings)'''
-    def __init__(self, dct, events, get_now):
-        super().__init__(dct, events, get_now)
+    __slots__ = ('last_took_photo', 'interval', 'shutter', 'priority', 'window', 'camera_id', 'bracket', 'sync')
+    sync_lead = 1.0 # seconds ahead of the planned instant a synchronized action is dispatched, for its cameras to arm
+
+    def __init__(self, dct, events, get_now, get_now_ns=None):
+        super().__init__(dct, events, get_now, get_now_ns)
         self.last_took_photo = None
         self.parse_additional_info(dct)
 
     def parse_additional_info(self, dct):
         '''parses out additional metadata in the json'''
         self.interval = dct.get('interval', None)
-        self.shutter = dct.get('shutter', None)
+        self.shutter = intern(dct.get('shutter', None)) # shared by every action with the same shutter or target
         self.priority = dct.get('priority', 0)
-        self.camera_id = dct.get('camera_id', None)
-        logging.info(f'Parsed Camera Action w/ time: {self.time}, end: {self.end}, start: {self.start}, interval: {self.interval}, shutter: {self.shutter}, camera_id: {self.camera_id}')
+        self.window = float(dct.get('window', 1)) # seconds a late single shot is still worth taking
+        self.camera_id = intern(dct.get('camera_id', None))
+        self.bracket = self.parse_bracket(dct.get('bracket', None)) # targets, shutters or stops, see Camera.bracket_shutters
+        self.sync = intern(dct.get('sync', None)) # name of the group of cameras released together, see SyncRelease
+
+    def parse_bracket(self, bracket):
+        '''returns the bracket as a tuple of target/shutter strings and float stops, None if the action isn't one'''
+        if bracket is None:
+            return None
+        if not isinstance(bracket, list) or len(bracket) == 0:
+            raise Exception(f'bracket of camera action "{self.text}" must be a list of targets, shutter speeds or stops')
+        steps = tuple(intern(step) if isinstance(step, str) else float(step) for step in bracket)
+        if self.shutter is None and any(isinstance(step, float) for step in steps):
+            raise Exception(f'bracket of camera action "{self.text}" has stops, but no shutter for them to be relative to')
+        return steps
+
+    def describe(self):
+        return f'time: {self.time}, end: {self.end}, start: {self.start}, interval: {self.interval}, shutter: {self.shutter}, bracket: {self.bracket}, sync: {self.sync}, camera_id: {self.camera_id}'
+
+    def lead_ns(self):
+        '''nanoseconds ahead of each planned instant the action is dispatched'''
+        if self.sync is None:
+            return 0
+        lead = self.sync_lead if not self.interval else min(self.sync_lead, float(self.interval) / 2) # before the previous frame's trigger
+        return int(lead * 1e9)
 
     def is_active(self):
         '''returns True or False if the action should currently be running'''
-        return self == self.get_now()
+        return self == self.get_now_ns()
 
     def time_until(self):
         '''time (in sec) left until the camera action is initiated'''
-        return (self.time - self.get_now()).total_seconds()
+        return (self.time_ns - self.get_now_ns()) / 1e9
 
     def time_left(self):
         '''time left (in sec) before the camera action is finished'''
         if self.end:
-            return (self.end - self.get_now()).total_seconds()
-        return (self.get_now() - self.time).total_seconds() + 1
+            return (self.end_ns - self.get_now_ns()) / 1e9
+        return (self.get_now_ns() - self.time_ns) / 1e9 + 1
 
     def is_continuous(self):
         '''returns True if it is an action that occurs over an interval (with multiple potential shutter presses)
@@ -766,58 +1793,313 @@ class CameraAction(Action):
 
     def is_current(self, now):
         '''returns True if action is between the start/end. used for panel'''
-        if now < self.time:
+        now = as_ns(now)
+        if now < self.time_ns:
             return False
         if self.time and self.start is None and self.end is None:
-            dt = (self.time - now).total_seconds()
-            return dt <= 0 and dt >= -1
-        if now >= self.start and now < self.end:
+            dt = self.time_ns - now
+            return dt <= 0 and dt >= -1_000_000_000
+        if now >= self.start_ns and now < self.end_ns:
             return True
         return False
 
+    def span(self):
+        '''see Action.span, covers both __eq__ and is_current'''
+        if self.time and self.start is None and self.end is None:
+            return self.time_ns, self.time_ns + 1_000_000_000
+        return self.start_ns, self.end_ns
+
+    def trigger_instants(self, first, last):
+        '''returns an int64 array of every instant (nanoseconds since the epoch) the action should be dispatched at.
+        first/last (nanoseconds) bound actions that have no start/end. continuous actions are dispatched once, at their start'''
+        if self.time and self.start is None and self.end is None:
+            return np.array([self.time_ns], dtype=np.int64) # single shot
+        start = first if self.start_ns is None else self.start_ns
+        end = last if self.end_ns is None else self.end_ns
+        if not self.interval:
+            return np.array([start] if start < end else [], dtype=np.int64)
+        return np.arange(start, end, int(float(self.interval) * 1e9), dtype=np.int64)
+
+    def deadline(self, planned):
+        '''returns the nanoseconds after which a trigger planned at planned (nanoseconds) is stale, None if it never goes stale'''
+        if self.is_continuous():
+            return self.end_ns
+        if self.interval:
+            next_trigger = planned + int(float(self.interval) * 1e9)
+            return next_trigger if self.end_ns is None else min(next_trigger, self.end_ns)
+        return planned + int(self.window * 1e9)
+
+    def expires(self, first, last):
+        '''returns the nanoseconds after which a trigger of this action is no longer worth dispatching on startup'''
+        if self.is_continuous():
+            return last if self.end_ns is None else self.end_ns
+        return None # a single frame's trigger window is one second from its instant
+
     def __eq__(self, other):
-        '''evaluate if the current action should be running given the comparison datetime obj'''
-        if isinstance(other, datetime.datetime):
+        '''evaluate if the current action should be running given the comparison datetime obj (or nanoseconds)'''
+        if isinstance(other, (datetime.datetime, int)):
+            other = as_ns(other)
             # Handle the case when self.time is specified, and start/end are not
             if self.time and self.start is None and self.end is None:
-                dt = (self.time - other).total_seconds()
-                return dt <= 0 and dt >= -1
+                dt = self.time_ns - other
+                return dt <= 0 and dt >= -1_000_000_000
             # When self.start and self.end are defined
             if self.start and self.end:
                 if self.interval:
                     # Check if 'other' is within the start and end times and aligns with the interval
-                    if self.start <= other < self.end:
-                        return (other - self.start).total_seconds() % self.interval < 1
+                    if self.start_ns <= other < self.end_ns:
+                        return (other - self.start_ns) / 1e9 % self.interval < 1
                 else:
                     # Just check if 'other' is within the start and end times
-                    return self.start <= other < self.end
+                    return self.start_ns <= other < self.end_ns
             # Handle cases where start or end could be None, considering interval
             if self.interval:
                 if self.start and not self.end:
-                    if other >= self.start:
-                        return (other - self.start).total_seconds() % self.interval < 1
+                    if other >= self.start_ns:
+                        return (other - self.start_ns) / 1e9 % self.interval < 1
                     return False
                 elif self.end and not self.start:
-                    if other <= self.end:
-                        return (other - datetime.datetime.min).total_seconds() % self.interval < 1
+                    if other <= self.end_ns:
+                        return other / 1e9 % self.interval < 1 # aligned to the epoch, there's no start to align to
                     return False
             # Handle cases where start or end is None, without interval
             if self.start and not self.end:
-                return other >= self.start # implicitly there is no end
+                return other >= self.start_ns # implicitly there is no end
             elif self.end and not self.start:
-                return other < self.end # implicitly it has already started
+                return other < self.end_ns # implicitly it has already started
             return False
         return NotImplemented
 
 
+class ActionIndex():
+    '''time index over a fixed list of actions. their start times are kept in a sorted array for "next" queries,
+    and their spans (see Action.span) in a centered interval tree for "active now" queries, so both take
+    O(log n + k) rather than a scan of every action. positions returned are indices into the list'''
+    lowest = np.iinfo(np.int64).min
+    highest = np.iinfo(np.int64).max
+    leaf_size = 32 # intervals below this are kept in a leaf and checked directly
+
+    def __init__(self, actions):
+        self.actions = actions
+        self.positions = None # id(action): position, built on first use
+        timed = [i for i, a in enumerate(actions) if not a.time_ns is None]
+        times = np.array([actions[i].time_ns for i in timed], dtype=np.int64)
+        order = np.argsort(times, kind='stable') # ties stay in list order
+        self.times = times[order]
+        self.order = np.array(timed, dtype=np.int64)[order]
+        spans = [a.span() for a in actions]
+        self.lo = np.array([self.lowest if lo is None else lo for lo, _ in spans], dtype=np.int64)
+        self.hi = np.array([self.highest if hi is None else hi for _, hi in spans], dtype=np.int64)
+        self.hi = np.maximum(self.lo, self.hi) # an empty span on both sides of a center would never be split off
+        self.tree = self.build(np.arange(len(actions)))
+
+    def build(self, idx):
+        '''returns the tree node for the intervals idx: (center, intervals containing center sorted by start and their
+        starts, the same sorted by descending end and their negated ends, node left of center, node right of it),
+        or for a few intervals a leaf, the array idx itself'''
+        if len(idx) == 0:
+            return None
+        if len(idx) <= self.leaf_size:
+            return idx
+        lo, hi = self.lo[idx], self.hi[idx]
+        ends = np.sort(np.concatenate([lo, hi]))
+        center = ends[len(ends) // 2] # an endpoint, so every interval can't fall on one side
+        here = idx[(lo <= center) & (hi >= center)]
+        by_lo = here[np.argsort(self.lo[here], kind='stable')]
+        by_hi = here[np.argsort(-self.hi[here], kind='stable')]
+        return (center, by_lo, self.lo[by_lo], by_hi, -self.hi[by_hi], self.build(idx[hi < center]), self.build(idx[lo > center]))
+
+    def position(self, action):
+        if self.positions is None:
+            self.positions = {id(a): i for i, a in enumerate(self.actions)}
+        return self.positions[id(action)]
+
+    def at(self, now):
+        '''returns the positions, in list order, of every action whose span contains now (a datetime or nanoseconds)'''
+        now = as_ns(now)
+        found = []
+        node = self.tree
+        while not node is None:
+            if isinstance(node, np.ndarray): # leaf
+                found.append(node[(self.lo[node] <= now) & (self.hi[node] >= now)])
+                break
+            center, by_lo, los, by_hi, neg_his, left, right = node
+            if now < center:
+                found.append(by_lo[:np.searchsorted(los, now, side='right')])
+                node = left
+            elif now > center:
+                found.append(by_hi[:np.searchsorted(neg_his, -now, side='right')])
+                node = right
+            else:
+                found.append(by_lo)
+                break
+        if not found:
+            return []
+        return np.sort(np.concatenate(found)).tolist()
+
+    def after(self, now):
+        '''yields the positions of actions that start after now, in time order'''
+        start = int(np.searchsorted(self.times, as_ns(now), side='right'))
+        for i in range(start, len(self.order)):
+            yield int(self.order[i])
+
+
+class TriggerTimeline():
+    '''every planned trigger instant for one camera, compiled into a sorted array and walked with a cursor
+    so each planned frame is dispatched exactly once. instants are ordered by when they're dispatched, which
+    is ahead of the planned instant for synchronized actions (see CameraAction.lead_ns)'''
+    never = np.iinfo(np.int64).max # expiry of actions that don't expire
+
+    def __init__(self, actions, first, last):
+        self.actions = actions
+        instants = [a.trigger_instants(first, last) for a in actions]
+        times = np.concatenate(instants) if instants else np.array([], dtype=np.int64)
+        indices = np.repeat(np.arange(len(actions)), [len(i) for i in instants])
+        leads = np.array([a.lead_ns() for a in actions], dtype=np.int64)[indices]
+        order = np.argsort(times - leads, kind='stable')
+        self.times = times[order] # int64 nanoseconds since the epoch
+        self.dispatch_times = self.times - leads[order] # when each instant is dispatched, sorted
+        self.indices = indices[order] # index into self.actions for each instant
+        expires = [a.expires(first, last) for a in actions]
+        self.expires = np.array([self.never if e is None else e for e in expires], dtype=np.int64)
+        self.cursor = 0
+        logging.info(f'compiled trigger timeline with {len(self.times)} instants for {len(actions)} actions')
+
+    def seek(self, now, window=1.0):
+        '''moves the cursor to the first instant within its trigger window of now (a datetime or nanoseconds).
+        returns continuous actions that started before now and haven't ended, which should be dispatched immediately'''
+        now = as_ns(now)
+        earliest = np.minimum.accumulate(self.times[::-1])[::-1] # earliest planned instant from each one on, ascending
+        self.cursor = int(np.searchsorted(earliest, now - int(window * 1e9), side='left'))
+        past = self.indices[:self.cursor]
+        running = past[(self.expires[past] > now) & (self.expires[past] != self.never)]
+        return [self.actions[i] for i in dict.fromkeys(running.tolist())]
+
+    def peek(self):
+        '''returns the action of the next instant, None if the timeline is exhausted'''
+        if self.cursor >= len(self.times):
+            return None
+        return self.actions[self.indices[self.cursor]]
+
+    def next_time(self):
+        '''returns the nanoseconds the next instant is dispatched at, None if the timeline is exhausted'''
+        if self.cursor >= len(self.times):
+            return None
+        return int(self.dispatch_times[self.cursor])
+
+    def pop_due(self, now):
+        '''returns (action, planned nanoseconds) for every instant due to be dispatched at or before now, advancing the cursor past them'''
+        now = as_ns(now)
+        due = []
+        while self.cursor < len(self.times) and self.dispatch_times[self.cursor] <= now:
+            due.append((self.actions[self.indices[self.cursor]], int(self.times[self.cursor])))
+            self.cursor += 1
+        return due
+
+
+class SyncRelease():
+    '''releases the cameras of a sync group together at one planned instant. each camera arms (sets its shutter,
+    rests its trigger) ahead of time and waits here; once all of them have armed they're released at the planned
+    instant, or straight away if that's already passed. cameras that haven't armed a window after the planned
+    instant are left behind, so one busy body doesn't hold up the rest. the skew is taken from each camera's
+    recorded trigger_sent time'''
+    margin = 2_000_000 # nanoseconds between the last camera arming late and the release, for every camera to wake up
+
+    def __init__(self, name, planned, cameras, window, clock):
+        self.name = name
+        self.planned = planned # nanoseconds
+        self.cameras = set(cameras) # camera_ids expected to arm
+        self.give_up = planned + int(window * 1e9)
+        self.clock = clock
+        self.cond = threading.Condition()
+        self.armed = set()
+        self.release = None # nanoseconds the armed cameras trigger at, once decided
+        self.sent = {} # camera_id: nanoseconds it triggered at
+
+    def arm(self, cam_id):
+        '''marks the camera armed, returns the release instant if it's been decided'''
+        with self.cond:
+            self.armed.add(cam_id)
+            if self.release is None and self.armed >= self.cameras:
+                self.release = max(self.planned, self.clock.now_ns() + self.margin)
+                self.cond.notify_all()
+            return self.ready()
+
+    def ready(self):
+        '''returns the release instant, None while still waiting on cameras to arm'''
+        if self.release is None and self.clock.now_ns() >= self.give_up:
+            with self.cond:
+                if self.release is None:
+                    logging.warning(f'sync group {self.name} released without {sorted(self.cameras - self.armed)}, they hadn\'t armed')
+                    self.release = self.clock.now_ns()
+                    self.cond.notify_all()
+        return self.release
+
+    def wait(self, cam_id, stop=None):
+        '''arms the camera and waits until the group is released. returns False if stop was set or the clock
+        jumped first, then the camera shouldn't trigger'''
+        release = self.arm(cam_id)
+        with self.cond:
+            while release is None:
+                if not stop is None and stop.is_set():
+                    return False
+                remaining = (self.give_up - self.clock.now_ns()) / 1e9 / self.clock.rate
+                self.cond.wait(max(0, min(remaining, self.clock.poll)))
+                release = self.ready()
+        return self.clock.wait_until(release, stop)
+
+    async def wait_async(self, cam_id, stop=None):
+        '''wait() for the asyncio engine. the triggers go out one after the other from the loop's thread'''
+        release = self.arm(cam_id)
+        while release is None:
+            if not stop is None and stop.is_set():
+                return False
+            await self.clock.wait_async(stop, 0.001)
+            release = self.ready()
+        jumps = self.clock.jumps
+        while self.clock.now_ns() < release:
+            if (not stop is None and stop.is_set()) or jumps != self.clock.jumps:
+                return False
+            await self.clock.wait_async(stop, min((release - self.clock.now_ns()) / 1e9, self.clock.poll))
+        return True
+
+    def fired(self, cam_id, sent):
+        '''takes the trigger_sent nanoseconds of the camera's first frame (see Camera.record_frame), logging the
+        group's skew once every camera has triggered'''
+        with self.cond:
+            if cam_id in self.sent:
+                return # resumed after being preempted, the first trigger is what counts
+            self.sent[cam_id] = sent
+            if len(self.sent) == len(self.cameras):
+                event_log.log('sync', group=self.name, planned=self.planned, release=self.release, skew_us=self.skew() / 1e3,
+                    late_us=(self.release - self.planned) / 1e3)
+
+    def skew(self):
+        '''nanoseconds between the first and last camera's trigger, None before two have triggered'''
+        if len(self.sent) < 2:
+            return None
+        return max(self.sent.values()) - min(self.sent.values())
+
+
 class CameraDispatch():
     '''instantiates and controls one or multiple cameras, dispatching appropriate jobs
     for each camera to it's own queue'''
-    def __init__(self, json_obj):
+    def __init__(self, json_obj, timer=None, simulate=False, simulation=None, clock=None, frames_path=None, profile=None):
+        self.timer = StartupTimer() if timer is None else timer
+        self.profile = profile # CameraProfile measured by --calibrate, None if there isn't one
+        self.frames = FrameRecorder() # per-frame stage timestamps, exported on complete
+        self.frames_path = frames_path # where to export them (--frames), only logged if None
+        self.simulate = simulate # every camera uses the simulated backend
+        self.simulation = {} if simulation is None else simulation # latency model for cameras that don't give their own
+        self.clock = Clock() if clock is None else clock
         self.cameras = {} # holds camera objects, their key is the id, object is value
         self.queues = {}
         self.locks = {}
         self.threads = []
+        self.timelines = {} # compiled trigger timelines, used to look ahead at each camera's next action
+        self.sync_members = {} # (sync group, planned nanoseconds): camera_ids released together then
+        self.releases = {} # (sync group, planned nanoseconds): SyncRelease, created as the group's actions are dispatched
+        self.dispatched = False # whether the first dispatch has been timed, see StartupTimer
         self.parse_camera_info(json_obj) # parse the json to determine which cameras to instantiate
         logging.info('initialized camera keys: {}'.format(self.cameras.keys()))
         logging.info('initialized threads: {}'.format(self.threads))
@@ -831,20 +2113,52 @@ class CameraDispatch():
         if len(camera_lst) < 1:
             logging.error('No camera objects given in .json file!')
             raise Exception('No camera objects given in .json file!')
+        if self.simulate is True:
+            camera_lst = [dict(camera_dct, backend='simulated', simulation=camera_dct.get('simulation', self.simulation_model(camera_dct.get('camera_id')))) for camera_dct in camera_lst]
+        usb_cameras = {}
+        if any(camera_dct.get('backend', 'gphoto2') != 'simulated' for camera_dct in camera_lst):
+            with self.timer.phase('usb auto-detect'):
+                usb_cameras = query_for_usb_cameras() # shared by every camera, rather than one auto-detect each
         for camera_dct in camera_lst:
             camera_id = camera_dct.get('camera_id', None)
             if camera_id in self.cameras.keys():
                 logging.error('Multiple Cameras must each be given a unique camera_id!')
                 raise Exception('Multiple Cameras must each be given a unique camera_id!')
-            self.cameras[camera_id] = Camera(camera_dct) # instantiates the camera
-            self.queues[camera_id] = queue.Queue()
+            profile = None if self.profile is None else self.profile.get(camera_id)
+            self.cameras[camera_id] = Camera(camera_dct, usb_cameras=usb_cameras, setup=False, clock=self.clock, frames=self.frames, profile=profile) # instantiates the camera
+        self.setup_cameras()
+        self.start_workers()
+
+    def simulation_model(self, camera_id):
+        '''latency model of a simulated camera that doesn't give its own: the dispatcher's, over its measured profile'''
+        if self.profile is None:
+            return self.simulation
+        return dict(self.profile.simulation(camera_id), **self.simulation)
+
+    def start_workers(self):
+        '''creates a queue, lock and worker thread for each camera'''
+        for camera_id in self.cameras:
+            self.queues[camera_id] = ActionQueue(name=camera_id, preempt=self.cameras[camera_id].preempt, frames=self.frames)
             queue_name = '{} Camera Queue'.format(camera_id)
             self.locks[camera_id] = threading.Lock() # create locks for sequential access to shared resources
             # start the thread
-            thread = threading.Thread(target=process_queue, args=(self.queues[camera_id],self.locks[camera_id]), name=queue_name)
+            on_idle = lambda cam_id=camera_id: self.prestage(cam_id) # look ahead whenever the queue runs dry
+            thread = threading.Thread(target=process_queue, args=(self.queues[camera_id],self.locks[camera_id], on_idle), name=queue_name)
             thread.start()
             self.threads.append(thread)
 
+    def setup_cameras(self):
+        '''runs each camera's setup (mode, sessions, serial ports) concurrently, timing each one'''
+        def timed_setup(camera):
+            start = time.perf_counter()
+            camera.setup()
+            return time.perf_counter() - start
+        with self.timer.phase('camera setup'):
+            with futures.ThreadPoolExecutor(max_workers=len(self.cameras), thread_name_prefix='camera setup') as pool:
+                pending = {cam_id: pool.submit(timed_setup, camera) for cam_id, camera in self.cameras.items()}
+                for cam_id, future in pending.items():
+                    self.timer.record(f'camera setup: {cam_id}', future.result())
+
     def get_camera_id(self, action):
         camera_ids = self.cameras.keys()
         if len(camera_ids) == 1:
@@ -853,50 +2167,606 @@ class CameraDispatch():
             raise Exception('action has camera_id: {}, which is not among camera_ids: {}'.format(action.camera_id, self.cameras.keys()))
         return action.camera_id
 
-    def dispatch_action(self, action):
+    def dispatch_action(self, action, planned=None):
+        '''queues the action on its camera. planned is the instant it was due, used to order and expire it'''
         cam_id = self.get_camera_id(action)
         if cam_id in self.cameras:
             camera = self.cameras[cam_id]
-            logging.info(f"Dispatching action {action} to camera {cam_id}")
+            if action.allowable is False:
+                logging.warning(f'camera {cam_id} is still busy with a previous trigger of {action}, queueing it')
             action.allowable = False
-            self.queues[cam_id].put((camera.process_action, action))
+            planned = action.get_now_ns() if planned is None else as_ns(planned)
+            dispatched = self.clock.now_ns()
+            event_log.log('dispatch', cam_id, action, planned=planned, ns=dispatched)
+            if self.dispatched is False:
+                self.dispatched = True
+                logging.info(f'first dispatch {self.timer.mark("first dispatch"):.3f}s after start')
+            frame = self.frames.start(cam_id, action, planned, dispatched)
+            func = self.process_func(cam_id)
+            if not action.sync is None:
+                func = functools.partial(func, sync=self.sync_release(action, planned))
+            self.queues[cam_id].put(func, action, priority=action.priority, deadline=action.deadline(planned), frame=frame)
         else:
             logging.warning(f"Camera ID {cam_id} not found among cameras")
 
+    def in_progress(self, action):
+        '''whether the action is being processed by its camera or waiting on its queue'''
+        q = self.queues.get(self.get_camera_id(action))
+        return not q is None and q.holds(action)
+
+    def sync_release(self, action, planned):
+        '''returns the SyncRelease of the action's sync group at planned (nanoseconds), shared by all its cameras'''
+        key = (action.sync, planned)
+        release = self.releases.get(key)
+        if release is None:
+            cameras = self.sync_members.get(key, {self.get_camera_id(action)})
+            release = self.releases[key] = SyncRelease(action.sync, planned, cameras, action.window, self.clock)
+        return release
+
+    def set_timelines(self, timelines):
+        '''gives the dispatcher the compiled timelines, and pre-stages every camera for its first action'''
+        self.timelines = timelines
+        self.sync_members = {}
+        for cam_id, timeline in timelines.items():
+            synced = np.flatnonzero(np.array([not a.sync is None for a in timeline.actions], dtype=bool)[timeline.indices])
+            for i in synced.tolist():
+                key = (timeline.actions[timeline.indices[i]].sync, int(timeline.times[i]))
+                self.sync_members.setdefault(key, set()).add(cam_id)
+        for key, cameras in self.sync_members.items():
+            if len(cameras) < 2:
+                logging.warning(f'sync group {key[0]} has only camera {next(iter(cameras))} at {from_ns(key[1])}, nothing to synchronize with')
+        for cam_id in timelines:
+            self.queues[cam_id].put(self.prestage_func(cam_id), cam_id, priority=float('-inf'))
+
+    def process_func(self, cam_id):
+        '''returns the function the camera's worker runs for a dispatched action'''
+        return self.cameras[cam_id].process_action
+
+    def prestage_func(self, cam_id):
+        '''returns the function the camera's worker runs to pre-stage its next action'''
+        return self.prestage
+
+    def prestage_action(self, cam_id):
+        '''returns the camera's next action if its shutter differs from the current one, otherwise None'''
+        timeline = self.timelines.get(cam_id)
+        if timeline is None:
+            return None
+        action = timeline.peek()
+        if action is None:
+            return None
+        camera = self.cameras[cam_id]
+        if camera.determine_shutter(action) == camera.current_shutter:
+            return None
+        return action
+
+    def prestage(self, cam_id):
+        '''while the camera is idle, sets the shutter its next action needs, so that action's first frame
+        doesn't wait on the shutter change. runs on the camera's own thread'''
+        action = self.prestage_action(cam_id)
+        if action is None:
+            return
+        camera = self.cameras[cam_id]
+        desired_shutter = camera.determine_shutter(action)
+        start = time.perf_counter()
+        if camera.set_shutter(action):
+            saved = time.perf_counter() - start
+            camera.prestage_saved += saved
+            logging.info(f'pre-staged shutter {desired_shutter} on camera {cam_id} for {action}, saving {saved:.3f}s at its first frame')
+
+    def check_plan(self, timelines):
+        '''compares each camera's actions with its measured profile, warning about the ones it can't keep up with'''
+        for cam_id, timeline in timelines.items():
+            camera = self.cameras[cam_id]
+            frame = camera.frame_seconds()
+            if frame is None:
+                continue
+            for action in timeline.actions:
+                if action.interval and float(action.interval) < frame:
+                    logging.warning(f'{action} on camera {cam_id} has an interval of {action.interval}s, but it was measured taking {frame:.3f}s a frame, some of its frames will be dropped')
+                elif action.is_continuous() and action.bracket is None:
+                    logging.info(f'{action} on camera {cam_id} should take about {int(action.duration() / frame)} frames at its measured {1 / frame:.2f} fps')
+                if not action.sync is None and camera.arm_seconds() > action.lead_ns() / 1e9:
+                    logging.warning(f'camera {cam_id} was measured taking {camera.arm_seconds():.3f}s to change its shutter, longer than the {action.lead_ns() / 1e9}s {action} is dispatched ahead to arm')
+
+    def calibrate(self, samples, duration):
+        '''measures every camera on its own worker, at the same time. returns {camera_id: measurements}'''
+        measured = {}
+        for cam_id, camera in self.cameras.items():
+            self.queues[cam_id].put(lambda cam_id, camera=camera: measured.update({cam_id: camera.calibrate(samples, duration)}), cam_id)
+        for q in self.queues.values():
+            q.close()
+        self.join_workers()
+        for camera in self.cameras.values():
+            camera.close()
+        return measured
+
     def complete(self):
         '''when finished, wait for all tasks to end and exit'''
         for q in self.queues.values():
-            q.put(None)
+            q.close()
+        self.join_workers()
+        for q in self.queues.values():
+            logging.info(f'camera queue {q.name} dropped {q.dropped} stale, merged {q.merged}, preempted {q.preempted} actions')
+        if self.frames_path is None:
+            self.frames.report()
+        else:
+            try:
+                self.frames.export(self.frames_path)
+            except OSError as e:
+                logging.warning(f'unable to export frame timings: {e}')
+        for camera in self.cameras.values():
+            logging.info(f'shutter pre-staging saved {camera.prestage_saved:.3f}s of shutter changes on camera {camera.camera_id}')
+            camera.close()
+        self.report_sync()
+
+    def sync_skews(self):
+        '''returns {sync group: [skew nanoseconds of each release every camera triggered for]}'''
+        skews = {}
+        for release in self.releases.values():
+            if len(release.sent) == len(release.cameras) and len(release.cameras) > 1:
+                skews.setdefault(release.name, []).append(release.skew())
+        return skews
+
+    def report_sync(self):
+        '''logs the inter-camera skew achieved by each sync group'''
+        skews = self.sync_skews()
+        for name in dict.fromkeys(release.name for release in self.releases.values()):
+            releases = [r for r in self.releases.values() if r.name == name]
+            incomplete = sum(len(r.sent) < len(r.cameras) for r in releases)
+            if name in skews:
+                us = np.array(skews[name]) / 1e3
+                logging.info(f'sync group {name}: {len(us)} releases, skew median {np.median(us):.0f}us max {us.max():.0f}us, {incomplete} missing a camera')
+            else:
+                logging.warning(f'sync group {name}: none of its {len(releases)} releases triggered every camera')
+
+    def join_workers(self):
         for thread in self.threads:
             thread.join()
 
 
-def process_queue(q, lock):
+class ActionQueue():
+    '''a camera's work queue, ordered by priority (highest first) then deadline (earliest first).
+    work whose deadline has passed is dropped when it reaches the front, a newer trigger of an action that
+    is still queued replaces the older one, and higher priority work ends a running continuous capture early'''
+    def __init__(self, name=None, preempt=None, frames=None):
+        self.name = name
+        self.preempt = threading.Event() if preempt is None else preempt # set to stop a running continuous capture
+        self.frames = FrameRecorder(capacity=1) if frames is None else frames # stamps when each frame is dequeued, dropped or merged
+        self.heap = [] # (-priority, deadline key, sequence, func, action, deadline, frame)
+        self.counter = itertools.count()
+        self.cond = threading.Condition()
+        self.closed = False
+        self.running = None # (priority, action) of the task being processed
+        self.dropped = 0 # stale tasks dropped
+        self.merged = 0 # tasks replaced by a newer trigger of the same action
+        self.preempted = 0 # continuous captures ended early for higher priority work
+
+    def put(self, func, action, priority=0, deadline=None, frame=None):
+        '''queues func(action). deadline is the nanoseconds after which the task is stale, None if it never is.
+        frame is the task's FrameRecorder row, if it has one'''
+        with self.cond:
+            if isinstance(action, Action):
+                queued = [entry for entry in self.heap if entry[4] is action]
+                if queued:
+                    self.heap = [entry for entry in self.heap if not entry[4] is action]
+                    heapq.heapify(self.heap)
+                    self.merged += len(queued)
+                    for entry in queued:
+                        self.frames.set_outcome(entry[6], 'merged')
+                    logging.info(f'merged queued trigger of {action} on camera {self.name} into its newer trigger')
+            key = TriggerTimeline.never if deadline is None else deadline
+            heapq.heappush(self.heap, (-priority, key, next(self.counter), func, action, deadline, frame))
+            if not self.running is None:
+                running_priority, running_action = self.running
+                if priority > running_priority and isinstance(running_action, CameraAction) and running_action.is_continuous():
+                    self.preempted += 1
+                    logging.info(f'preempting {running_action} on camera {self.name} for higher priority {action}')
+                    self.preempt.set()
+            self.notify()
+
+    def notify(self):
+        '''wakes the worker, called with the condition held'''
+        self.cond.notify_all()
+
+    def pop(self):
+        '''returns the next task that isn't stale as (func, action, priority, frame), None if there isn't one'''
+        with self.cond:
+            while self.heap:
+                neg_priority, _, _, func, action, deadline, frame = heapq.heappop(self.heap)
+                if not deadline is None and isinstance(action, Action) and action.get_now_ns() > deadline:
+                    self.dropped += 1
+                    self.frames.set_outcome(frame, 'dropped')
+                    logging.warning(f'dropping stale {action} on camera {self.name}, its window ended at {from_ns(deadline)}')
+                    continue
+                self.running = (-neg_priority, action)
+                self.preempt.clear()
+                if isinstance(action, Action):
+                    self.frames.stamp(frame, 'dequeued', action.get_now_ns())
+                return func, action, -neg_priority, frame
+            return None
+
+    def get(self):
+        '''blocks until a task is available, returns (func, action, priority, frame), or None once closed and drained'''
+        with self.cond:
+            while True:
+                task = self.pop()
+                if not task is None:
+                    return task
+                if self.closed:
+                    return None
+                self.cond.wait()
+
+    def done(self):
+        with self.cond:
+            self.running = None
+
+    def holds(self, action):
+        '''whether action is being processed or waiting in the queue'''
+        with self.cond:
+            if not self.running is None and self.running[1] is action:
+                return True
+            return any(entry[4] is action for entry in self.heap)
+
+    def empty(self):
+        with self.cond:
+            return not self.heap
+
+    def close(self):
+        '''lets the worker exit once the queue has drained'''
+        with self.cond:
+            self.closed = True
+            self.notify()
+
+
+def process_queue(q, lock, on_idle=None):
     while True:
         task = q.get()
         if task is None:
-            q.task_done()
             break
-        func, action = task
+        func, action, priority, frame = task
         with lock:
-            logging.info(f"Executing action {action} with function {func}")
-            func(action)
-        q.task_done()
+            event_log.log('execute', q.name, action, priority=priority)
+            try:
+                if frame is None:
+                    func(action)
+                else:
+                    func(action, frame=frame)
+            except Exception:
+                logging.exception(f'error running {action} on camera {q.name}') # the worker carries on with the next task
+            finally:
+                preempted = q.preempt.is_set()
+                q.done()
+            if preempted and isinstance(action, CameraAction) and action.is_active():
+                resumed = None if frame is None else q.frames.next_frame(frame)
+                q.put(func, action, priority=priority, deadline=action.end_ns, frame=resumed) # resume once the higher priority work is done
+            elif not on_idle is None and q.empty():
+                on_idle()
+
+
+class AsyncActionQueue(ActionQueue):
+    '''ActionQueue for the asyncio engine. the worker awaits an asyncio.Event set through the event loop
+    instead of blocking a thread on the condition'''
+    def __init__(self, loop, name=None, preempt=None, frames=None):
+        super().__init__(name=name, preempt=preempt, frames=frames)
+        self.loop = loop
+        self.ready = asyncio.Event()
+
+    def notify(self):
+        self.loop.call_soon_threadsafe(self.ready.set)
+
+    async def get_async(self):
+        '''waits until a task is available, returns (func, action, priority, frame), or None once closed and drained'''
+        while True:
+            self.ready.clear() # cleared before checking, so a put in between still wakes us
+            task = self.pop()
+            if not task is None:
+                return task
+            if self.closed:
+                return None
+            await self.ready.wait()
+
+
+class AsyncCameraDispatch(CameraDispatch):
+    '''alternative to CameraDispatch that drives every camera from one asyncio event loop on a single thread.
+    gphoto2 runs through asyncio subprocesses and serial pulses are timed with asyncio sleeps, so idle
+    cameras cost a suspended coroutine rather than a blocked OS thread'''
+    def __init__(self, json_obj, timer=None, simulate=False, simulation=None, clock=None, frames_path=None, profile=None):
+        self.loop = asyncio.new_event_loop()
+        self.loop_thread = threading.Thread(target=self.loop.run_forever, name='Camera Event Loop', daemon=True)
+        self.loop_thread.start()
+        self.workers = {} # camera_id: AsyncCameraWorker
+        self.tasks = []
+        super().__init__(json_obj, timer=timer, simulate=simulate, simulation=simulation, clock=clock, frames_path=frames_path, profile=profile)
+
+    def run_in_loop(self, coro):
+        '''runs the coroutine on the event loop from another thread, and waits for its result'''
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    def setup_cameras(self):
+        async def timed_setup(worker):
+            start = time.perf_counter()
+            await worker.setup()
+            return time.perf_counter() - start
+        async def setup_all():
+            return await asyncio.gather(*(timed_setup(w) for w in self.workers.values()))
+        for cam_id, camera in self.cameras.items():
+            self.workers[cam_id] = AsyncCameraWorker(camera, self)
+        with self.timer.phase('camera setup'):
+            durations = self.run_in_loop(setup_all())
+        for cam_id, seconds in zip(self.workers, durations):
+            self.timer.record(f'camera setup: {cam_id}', seconds)
+
+    def start_workers(self):
+        for cam_id, worker in self.workers.items():
+            self.queues[cam_id] = AsyncActionQueue(self.loop, name=cam_id, preempt=self.cameras[cam_id].preempt, frames=self.frames)
+            worker.q = self.queues[cam_id]
+            self.tasks.append(asyncio.run_coroutine_threadsafe(worker.run(), self.loop))
+
+    def process_func(self, cam_id):
+        return self.workers[cam_id].process_action
+
+    def prestage_func(self, cam_id):
+        return self.workers[cam_id].prestage
+
+    def join_workers(self):
+        for task in self.tasks:
+            task.result()
+        for worker in self.workers.values():
+            self.run_in_loop(worker.close())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.loop_thread.join()
+
+
+class AsyncCameraWorker():
+    '''the asyncio engine's counterpart of process_queue and Camera.process_action for a single camera'''
+    def __init__(self, camera, dispatcher):
+        self.camera = camera
+        self.dispatcher = dispatcher
+        self.q = None # AsyncActionQueue, set once the workers are started
+        self.session = None # AsyncGphotoSession, None when running one gphoto2 process per command
+
+    async def setup(self):
+        camera = self.camera
+        if camera.backend == 'simulated':
+            self.session = SimulatedAsyncSession(camera.get_session())
+        elif camera.usb_session is True:
+            session = AsyncGphotoSession(port=camera.usb_port, name=camera.camera_id)
+            if await session.start():
+                self.session = session
+            else:
+                logging.warning(f'unable to start gphoto2 session for {camera.camera_id}, falling back to one process per command')
+        logging.info(f'Setting camera mode to capturetarget=1 (saves image to camera)')
+        if not await self.gphoto2('set-config', 'capturetarget=1'):
+            logging.warning('Failed setting camera mode to capturetarget=1')
+        if camera.use_serial():
+            camera.get_serial()
+
+    async def run(self):
+        while True:
+            task = await self.q.get_async()
+            if task is None:
+                break
+            func, action, priority, frame = task
+            event_log.log('execute', self.camera.camera_id, action, priority=priority)
+            try:
+                if frame is None:
+                    await func(action)
+                else:
+                    await func(action, frame=frame)
+            except Exception:
+                logging.exception(f'error running {action} on camera {self.camera.camera_id}')
+            finally:
+                preempted = self.q.preempt.is_set()
+                self.q.done()
+            if preempted and isinstance(action, CameraAction) and action.is_active():
+                resumed = None if frame is None else self.q.frames.next_frame(frame)
+                self.q.put(func, action, priority=priority, deadline=action.end_ns, frame=resumed)
+            elif self.q.empty():
+                await self.prestage()
+
+    async def gphoto2(self, command, value=None):
+        '''runs a gphoto2 command ('capture-image' or 'set-config' with value name=value), returns True if successful'''
+        if not self.session is None and self.session.is_alive():
+            line = command if value is None else f'{command} {value}'
+            return await self.session.command(line)
+        args = ['gphoto2'] if self.camera.usb_port is None else ['gphoto2', '--port', self.camera.usb_port]
+        args += [f'--{command}'] if value is None else [f'--{command}', value]
+        proc = await asyncio.create_subprocess_exec(*args, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+        _, stderr = await proc.communicate()
+        if proc.returncode != 0:
+            logging.warning(f'gphoto2 {command} failed on camera {self.camera.camera_id}: {stderr.decode(errors="replace")}')
+        return proc.returncode == 0
+
+    async def process_action(self, action, frame=None, sync=None):
+        '''async Camera.process_action'''
+        camera = self.camera
+        camera.begin_action(action, frame)
+        try:
+            if not sync is None:
+                await self.arm(action)
+                if not await sync.wait_async(camera.camera_id, camera.preempt):
+                    camera.missed_release(sync)
+                    return
+                camera.sync = sync
+            if not action.bracket is None:
+                await self.take_bracket(action)
+            else:
+                if camera.sets_shutter(action, sync) and await self.set_shutter(action):
+                    camera.stamp('shutter_set')
+                await self.take_photo(action)
+        finally:
+            camera.end_action(action)
+
+    async def arm(self, action):
+        '''async Camera.arm'''
+        camera = self.camera
+        if await self.set_shutter(action):
+            camera.stamp('shutter_set')
+        trigger = camera.get_serial() if camera.use_serial() else None
+        if not trigger is None:
+            await trigger.wait_ready_async()
+
+    async def set_shutter(self, action):
+        '''async Camera.set_shutter, retries until the camera's shutter_timeout'''
+        return await self.set_shutter_speed(self.camera.determine_shutter(action))
+
+    async def set_shutter_speed(self, desired_shutter):
+        camera = self.camera
+        if desired_shutter == camera.current_shutter:
+            return True
+        deadline = time.perf_counter() + camera.shutter_timeout
+        while time.perf_counter() < deadline:
+            if await self.gphoto2('set-config', f'shutterspeed={desired_shutter}'):
+                camera.current_shutter = desired_shutter
+                return True
+            await asyncio.sleep(0.01)
+        logging.warning('Timeout exceeded while trying to set shutter speed.')
+        return False
+
+    async def take_photo(self, action):
+        '''async Camera.take_photo. without a persistent serial trigger the port is opened on a thread, like the
+        thread engine does'''
+        camera = self.camera
+        mode = camera.capture_mode(action)
+        trigger = camera.get_serial() if camera.use_serial() else None
+        if mode == 'burst': # timed with a spin, so it runs on a thread rather than holding up the loop
+            await asyncio.to_thread(serial_burst_capture, action, trigger, camera.serial_burst_fps, camera.serial_burst_width,
+                camera.preempt, camera.clock, camera.record_pulse)
+        elif mode == 'hold':
+            sent = camera.clock.now_ns()
+            if trigger is None:
+                await asyncio.to_thread(serial_continuous_capture, action, camera.serial_port, camera.baud, None, None, camera.preempt, camera.clock)
+            else:
+                trigger.hold()
+                try:
+                    while action.is_active() and not camera.preempt.is_set():
+                        await camera.clock.wait_async(camera.preempt, action.time_left())
+                finally:
+                    trigger.release()
+            camera.record_frame(sent, camera.clock.now_ns())
+        elif mode == 'usb_loop':
+            while action.is_active() and not camera.preempt.is_set():
+                sent = camera.clock.now_ns()
+                ok = await self.usb_capture()
+                camera.record_frame(sent, camera.clock.now_ns(), ok)
+                if not ok:
+                    logging.warning(f'Issue with taking photo via usb on camera {camera.camera_id}')
+                await camera.clock.wait_async(camera.preempt, camera.usb_interval())
+        elif mode == 'pulse':
+            if not trigger is None:
+                await trigger.wait_ready_async()
+            sent = camera.clock.now_ns()
+            if trigger is None:
+                await asyncio.to_thread(serial_trigger_shutter_once, camera.serial_port, camera.baud, camera.pulse_width, 0.1)
+            else:
+                await trigger.pulse_async()
+            camera.record_frame(sent, camera.clock.now_ns())
+        else:
+            sent = camera.clock.now_ns()
+            ok = await self.usb_capture()
+            camera.record_frame(sent, camera.clock.now_ns(), ok)
+            if not ok:
+                logging.warning(f'Failed to take usb photo on camera {camera.camera_id}')
+
+    async def take_bracket(self, action):
+        '''async Camera.take_bracket'''
+        camera = self.camera
+        for shutter in camera.bracket_frames(action):
+            sent = camera.clock.now_ns()
+            ok = await self.bracket_frame(shutter)
+            camera.record_frame(sent, camera.clock.now_ns(), ok)
+
+    async def bracket_frame(self, shutter):
+        '''async Camera.bracket_frame'''
+        camera = self.camera
+        if camera.stages_bracket(shutter):
+            await self.set_shutter_speed(shutter)
+        trigger = camera.get_serial() if camera.use_serial() else None
+        if trigger is None:
+            return await self.usb_capture()
+        await trigger.wait_ready_async()
+        await trigger.pulse_async()
+        return True
+
+    async def usb_capture(self):
+        '''async Camera.usb_capture'''
+        camera = self.camera
+        configs = camera.take_staged()
+        if configs is None:
+            return await self.gphoto2('capture-image')
+        sent = camera.clock.now_ns()
+        event_log.log('usb trigger', camera.camera_id, port=camera.usb_port, configs=configs)
+        if not self.session is None and self.session.is_alive():
+            results = await self.session.batch([f'set-config {name}={value}' for name, value in configs.items()] + ['capture-image'])
+            configured, captured = all(results[:-1]), results[-1]
+        else:
+            proc = await asyncio.create_subprocess_exec(*gphoto2_args(camera.usb_port, configs, capture=True), stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+            _, stderr = await proc.communicate()
+            configured = captured = proc.returncode == 0
+            if proc.returncode != 0: # see usb_capture_with_config
+                logging.warning(f'gphoto2 failed to set {configs} and capture on camera {camera.camera_id}: {stderr.decode(errors="replace")}, capturing on its own')
+                captured = await self.gphoto2('capture-image')
+                proc = await asyncio.create_subprocess_exec(*gphoto2_args(camera.usb_port, configs), stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+                await proc.communicate()
+                configured = proc.returncode == 0
+        camera.staged_result(configs, configured, sent)
+        return captured
+
+    async def prestage(self, cam_id=None):
+        '''async CameraDispatch.prestage'''
+        cam_id = self.camera.camera_id
+        action = self.dispatcher.prestage_action(cam_id)
+        if action is None:
+            return
+        start = time.perf_counter()
+        if await self.set_shutter(action):
+            saved = time.perf_counter() - start
+            self.camera.prestage_saved += saved
+            logging.info(f'pre-staged shutter {self.camera.current_shutter} on camera {cam_id} for {action}, saving {saved:.3f}s at its first frame')
+
+    async def close(self):
+        if not self.session is None:
+            self.camera.usb_latency = self.session.latency_summary()
+            logging.info(f'gphoto2 session latency for {self.camera.camera_id}: {self.camera.usb_latency}')
+            await self.session.close()
+            self.session = None
 
 
 class Camera():
     '''controls a single camera'''
-    def __init__(self, dct):
+    def __init__(self, dct, usb_cameras=None, setup=True, clock=None, frames=None, profile=None):
+        self.clock = Clock() if clock is None else clock
+        self.profile = {} if profile is None else profile # its measurements from --calibrate, see CameraProfile
+        self.frames = frames # FrameRecorder shared by the dispatcher, None to not record
+        self.frame = None # FrameRecorder row of the action being processed
+        self.frame_count = 0 # frames taken for it so far
         self.camera_id = None
         self.f_ratio = None
         self.iso = None
+        self.exposure_table = None # shutter strings for each allowable target, rebuilt when the enhancement factor changes
         self.enhancement_factor = None
         self.current_shutter = None # what the shutter speed is set to
+        self.pending_config = {} # name: value to set along with the next usb capture, see stage_shutter
         self.currently_active = None # whether it's currently taking a picture
         self.shutter_timeout = 10 # max number of seconds to attempt shutter change continuing to take photos
+        self.session = None # persistent gphoto2 session, None if disabled or unavailable
+        self.usb_latency = {} # the session's latency_summary, kept once it's closed
+        self.serial = None # persistent serial trigger, opened on first use
+        self.prestage_saved = 0 # seconds of shutter changes moved out of the way of a trigger by pre-staging
+        self.preempt = threading.Event() # set by the camera's queue to end a continuous capture early
+        self.active_action = None # the action being processed, read by simulated backends to attribute frames
+        self.sync = None # SyncRelease of the synchronized action being processed, until its first frame is recorded
+        self.captures = [] # (datetime, action) of every frame taken by a simulated backend
         self.parse_info(dct) # fills out iso/f_ratio/enhancement factor/camera_id
-        self.test_ports() # validate ports
+        self.test_ports(usb_cameras) # validate ports
+        if setup is True:
+            self.setup()
+
+    def setup(self):
+        '''prepares the camera for capture. can be run concurrently for several cameras'''
         self.set_mode() # sets mode to save to card on camera
+        if self.use_serial():
+            self.get_serial() # open the serial port now, rather than on the first trigger
 
     def parse_info(self, dct):
         # dct is the camera dct from equipment json
@@ -907,9 +2777,26 @@ class Camera():
         self.iso = float(dct.get('iso', 100))
         self.enhancement_factor = float(dct.get('enhancement_factor', 1.0))
         self.shutter_timeout = float(dct.get('shutter_timeout', 10))
-        
-    def test_ports(self):
-        '''attempts to validate/test usb and serial ports for camera'''
+        self.usb_session = bool(dct.get('usb_session', True)) # keep a gphoto2 --shell open instead of a process per command
+        self.batch_usb = bool(dct.get('batch_usb', True)) # set the shutter in the same round trip as the usb capture after it
+        self.backend = dct.get('backend', 'gphoto2') # 'gphoto2' for real cameras, 'simulated' for no hardware
+        self.simulation = dict(dct.get('simulation', {})) # latency model for the simulated backend, see SimulatedGphotoSession
+        if self.backend == 'simulated':
+            self.usb_session = True # the simulated backend only exists as a session
+        self.baud = int(dct.get('baud', 9600))
+        self.pulse_width = float(dct.get('pulse_width', 0.1)) # seconds rts is held for a single serial shot
+        self.pulse_period = float(dct.get('pulse_period', 1.0)) # minimum seconds between the start of serial shots
+        burst_fps = dct.get('serial_burst_fps', None)
+        self.serial_burst_fps = None if burst_fps is None else float(burst_fps) # pulses per second for continuous serial captures, None holds rts instead
+        self.serial_burst_width = float(dct.get('serial_burst_width', 0.05)) # seconds rts is held for each pulse of a burst
+        if not self.serial_burst_fps is None and not 0 < self.serial_burst_width < 1 / self.serial_burst_fps:
+            raise Exception(f'serial_burst_width of camera {self.camera_id} must be positive and shorter than 1 / serial_burst_fps')
+
+    def test_ports(self, usb_cameras=None):
+        '''attempts to validate/test usb and serial ports for camera. usb_cameras is the result of
+        query_for_usb_cameras, shared between cameras so the bus is only auto-detected once'''
+        if self.backend == 'simulated':
+            return # nothing to validate
         # test serial port
         serial_port = self.serial_port
         usb_port = self.usb_port
@@ -926,7 +2813,7 @@ class Camera():
             #logging.error(f'serial port not found: {serial_port}')
             #raise Exception(f'serial port not found: {serial_port}')
         # test usb port
-        cam_dct = query_for_usb_cameras() # camera/usb port pairs
+        cam_dct = query_for_usb_cameras() if usb_cameras is None else usb_cameras # camera/usb port pairs
         if not usb_port is None and not usb_port in cam_dct.values():
             logging.error('usb port not found: {}'.format(usb_port))
             raise Exception('usb port not found: {}'.format(usb_port))
@@ -942,6 +2829,13 @@ class Camera():
     def set_mode(self):
         '''sets camera to save to memory card (some default modes will attempt to save to computer, resulting in lost data)'''
         logging.info(f'Setting camera mode to capturetarget=1 (saves image to camera)')
+        session = self.get_session()
+        if not session is None:
+            if session.set_config('capturetarget', 1):
+                logging.info(f'setting camera mode was successful.')
+                return True
+            logging.warning('Failed setting camera mode to capturetarget=1')
+            return False
         try:
             if self.usb_port is None:
                 result = subprocess.run(['gphoto2', '--set-config', 'capturetarget=1'], stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
@@ -956,6 +2850,63 @@ class Camera():
         logging.warning('Failed setting camera mode to capturetarget=1')
         return False
 
+    def get_session(self):
+        '''returns the persistent gphoto2 session, starting it on first use. returns None if it is disabled or fails to start'''
+        if self.usb_session is False:
+            return None
+        if self.session is None or not self.session.is_alive():
+            if self.backend == 'simulated':
+                session = SimulatedGphotoSession(self, self.clock, **self.simulation)
+            else:
+                session = GphotoSession(port=self.usb_port, name=self.camera_id)
+            if not session.start():
+                logging.warning(f'unable to start gphoto2 session for {self.camera_id}, falling back to one process per command')
+                self.usb_session = False
+                return None
+            self.session = session
+        return self.session
+
+    def get_serial(self):
+        '''returns the persistent serial trigger, opening it on first use. returns None if the port can't be opened'''
+        if self.serial is None:
+            if self.backend == 'simulated':
+                trigger = SimulatedSerialTrigger(self, self.clock, **self.simulation)
+            else:
+                # pulses are timed in real seconds, a camera doesn't see a faster eclipse clock
+                trigger = SerialTrigger(self.serial_port, baud=self.baud, pulse_width=self.pulse_width, pulse_period=self.pulse_period)
+            if not trigger.open():
+                return None
+            self.serial = trigger
+        return self.serial
+
+    def close(self):
+        '''closes any persistent connections held by the camera'''
+        if not self.serial is None:
+            self.serial.close()
+            self.serial = None
+        if not self.session is None:
+            self.usb_latency = self.session.latency_summary()
+            logging.info(f'gphoto2 session latency for {self.camera_id}: {self.usb_latency}')
+            self.session.close()
+            self.session = None
+        if self.backend == 'simulated':
+            logging.info(f'simulated camera {self.camera_id} took {len(self.captures)} frames')
+
+    @property
+    def enhancement_factor(self):
+        return self._enhancement_factor
+
+    @enhancement_factor.setter
+    def enhancement_factor(self, value):
+        self._enhancement_factor = value
+        self.exposure_table = None # invalidate, it's rebuilt on the next lookup
+        self.bracket_table = {} # id(action): shutter strings of its bracket, see bracket_shutters
+
+    def get_exposure_table(self):
+        '''returns a dict of target: shutter string for the camera's current settings'''
+        if self.exposure_table is None:
+            self.exposure_table = build_exposure_table(self.f_ratio, self.iso, self.enhancement_factor)
+        return self.exposure_table
 
     def use_serial(self):
         '''returns True or False if the camera is set to use the serial port for taking pictures'''
@@ -964,60 +2915,478 @@ class Camera():
         return True
 
     # initiate actions/shutter/shutterspeed changes
-    def process_action(self, action):
-        '''initiate the action'''
-        logging.info(f"Processing action {action} in camera {self.camera_id}")
+    def process_action(self, action, frame=None, sync=None):
+        '''initiate the action. frame is its FrameRecorder row, sync the SyncRelease of a synchronized action'''
+        self.begin_action(action, frame)
+        try:
+            if not sync is None:
+                self.arm(action)
+                if not sync.wait(self.camera_id, self.preempt): # until every camera in the group is armed and the planned instant
+                    self.missed_release(sync)
+                    return
+                self.sync = sync # given the first frame's trigger time, see record_frame
+            if not action.bracket is None:
+                self.take_bracket(action) # sets its own shutters, one per frame
+            else:
+                if self.sets_shutter(action, sync) and self.set_shutter(action): # determine and set the requisite shutter speed if necessary
+                    self.stamp('shutter_set')
+                self.take_photo(action) # take the photo for as long a required
+        finally:
+            self.end_action(action)
+
+    # decisions shared with the asyncio engine (AsyncCameraWorker), which awaits the same steps
+    def begin_action(self, action, frame=None):
+        '''marks action as the one being processed, frame its FrameRecorder row'''
+        event_log.log('process', self.camera_id, action, ns=self.clock.now_ns())
         self.currently_active = True
-        self.set_shutter(action) # determine and set the requisite shutter speed if necessary
-        self.take_photo(action) # take the photo for as long a required
-        action.allowable = True # make the action allowable again
+        self.active_action = action
+        self.frame, self.frame_count = frame, 0
+
+    def end_action(self, action):
+        '''makes the action allowable again and frees the camera, however processing it ended'''
+        action.allowable = True
+        self.active_action = None
         self.currently_active = False
+        self.sync = None
+
+    def missed_release(self, sync):
+        '''the camera was preempted, or the clock jumped, before its sync group was released. the frame is dropped
+        rather than triggered out of sync with the group'''
+        logging.warning(f'camera {self.camera_id} missed the release of sync group {sync.name}, skipping its trigger')
+        if not self.frames is None:
+            self.frames.set_outcome(self.frame, 'dropped')
+
+    def sets_shutter(self, action, sync=None):
+        '''whether the shutter of an action (not a bracket) is to be set before its first frame. it isn't if the
+        camera armed for a sync release, or if it's staged to be set along with the first usb capture'''
+        if not sync is None:
+            return False # its shutter was set as it armed
+        if self.batches_shutter():
+            self.stage_shutter(action) # see usb_capture
+            return False
+        return True
+
+    def capture_mode(self, action):
+        '''how the action is triggered: 'burst' (a serial pulse train, see serial_burst_capture), 'hold' (rts held
+        until the action is over), 'usb_loop' (usb captures until it's over), 'pulse' (a serial pulse) or 'usb' '''
+        if action.is_continuous():
+            if self.bursts():
+                return 'burst'
+            return 'hold' if self.use_serial() else 'usb_loop'
+        return 'pulse' if self.use_serial() else 'usb'
+
+    def bracket_frames(self, action):
+        '''yields the shutter of each frame of the action's bracket for as long as it runs (see bracket_running)'''
+        shutters = self.bracket_shutters(action)
+        taken = 0
+        while self.bracket_running(action, taken):
+            yield shutters[taken % len(shutters)]
+            taken += 1
+        self.bracket_done(action, taken)
+
+    def stages_bracket(self, shutter):
+        '''readies the shutter of a bracket frame, returns True if it is to be set on its own before the frame. on usb
+        cameras that batch it's staged for the frame's capture instead'''
+        if shutter == self.current_shutter:
+            return False
+        if self.batches_shutter():
+            self.pending_config['shutterspeed'] = shutter # see usb_capture
+            return False
+        return True
+
+    def take_staged(self):
+        '''returns the configs staged for the next usb capture, clearing them, or None if there are none'''
+        if not self.pending_config:
+            return None
+        configs, self.pending_config = self.pending_config, {}
+        return configs
+
+    def arm(self, action):
+        '''gets ready to trigger the action without delay: its shutter set and the serial trigger rested'''
+        if self.set_shutter(action):
+            self.stamp('shutter_set')
+        trigger = self.get_serial() if self.use_serial() else None
+        if not trigger is None:
+            trigger.wait_ready()
 
     def take_photo(self, action):
         '''takes the photo, for whatever requisite duration, using the usb or serial connection'''
-        if action.is_continuous():
-            if self.use_serial():
-                serial_continuous_capture(action, port=self.serial_port, baud=9600, timeout=None)
-            else:
-                usb_continuous_capture(action, port=self.usb_port, interval=0)
+        mode = self.capture_mode(action)
+        if mode == 'burst':
+            serial_burst_capture(action, self.get_serial(), self.serial_burst_fps, self.serial_burst_width, stop=self.preempt, clock=self.clock, on_pulse=self.record_pulse)
+        elif mode == 'hold':
+            sent = self.clock.now_ns()
+            serial_continuous_capture(action, port=self.serial_port, baud=self.baud, timeout=None, trigger=self.get_serial(), stop=self.preempt, clock=self.clock)
+            self.record_frame(sent, self.clock.now_ns()) # a burst is recorded as one frame, the camera doesn't say how many it took
+        elif mode == 'usb_loop':
+            usb_continuous_capture(action, port=self.usb_port, interval=self.usb_interval(), session=self.get_session(), stop=self.preempt, clock=self.clock, on_frame=self.record_frame, capture=self.usb_capture)
+        elif mode == 'pulse':
+            trigger = self.get_serial()
+            if not trigger is None:
+                trigger.wait_ready() # so the rate limit isn't counted as trigger latency
+            sent = self.clock.now_ns()
+            serial_trigger_shutter_once(self.serial_port, baud=self.baud, interval=self.pulse_width, timeout=0.1, trigger=trigger)
+            self.record_frame(sent, self.clock.now_ns())
         else:
-            # take a single photo
-            if self.use_serial():
-                serial_trigger_shutter_once(self.serial_port, interval=0.1, timeout=0.1) 
-            else:
-                usb_trigger_shutter_once(port=self.usb_port)
+            sent = self.clock.now_ns()
+            ok = self.usb_capture()
+            self.record_frame(sent, self.clock.now_ns(), ok)
+
+    def calibrate(self, samples, duration, gap=0.5):
+        '''exercises the camera through its usual set-config and capture paths, returning its measurements for a
+        CameraProfile. single captures and shutter changes are gap seconds apart so the camera is idle for each.
+        every capture takes a frame'''
+        shutters = ('1/250', '1/500') # alternated, so every set-config is a change
+        measured = {'connection': 'serial' if self.use_serial() else 'usb', 'capture': {}, 'fps': {}}
+        logging.info(f'calibrating camera {self.camera_id}')
+        measured['shutter'] = CameraProfile.stats(self.time_calls(samples, lambda i: self.set_shutter_speed(shutters[i % 2]), gap=gap))
+        measured['capture']['usb'] = CameraProfile.stats(self.time_calls(samples, lambda i: self.usb_capture(), gap=gap))
+        if not measured['capture']['usb'] is None:
+            measured['fps']['usb'] = self.sustained_fps(lambda i: self.usb_capture(), duration)
+        if self.batches_shutter() and not measured['shutter'] is None:
+            def batched(i):
+                self.pending_config['shutterspeed'] = shutters[i % 2]
+                return self.usb_capture()
+            measured['batched'] = CameraProfile.stats(self.time_calls(samples, batched, gap=gap))
+        trigger = self.get_serial() if self.use_serial() else None
+        if not trigger is None:
+            def pulse(i):
+                serial_trigger_shutter_once(self.serial_port, baud=self.baud, interval=self.pulse_width, timeout=0.1, trigger=trigger)
+                return True
+            measured['capture']['serial'] = CameraProfile.stats(self.time_calls(samples, pulse, gap=gap, prepare=trigger.wait_ready))
+            measured['fps']['serial'] = self.sustained_fps(pulse, duration, prepare=trigger.wait_ready)
+        logging.info(f'calibrated camera {self.camera_id}: {measured}')
+        return measured
+
+    def time_calls(self, count, func, gap=0, prepare=None):
+        '''returns the real seconds each of count calls of func(i) took, stopping at the first that fails (returns
+        False or raises) so a connection the camera doesn't have isn't tried over and over. prepare() runs untimed before each'''
+        seconds = []
+        for i in range(count):
+            time.sleep(gap)
+            if not prepare is None:
+                prepare()
+            start = self.clock.monotonic()
+            try:
+                ok = func(i)
+            except Exception as e:
+                logging.warning(f'calibrating camera {self.camera_id} stopped: {e}')
+                break
+            if ok is False:
+                logging.warning(f'calibrating camera {self.camera_id} stopped, a call failed')
+                break
+            seconds.append(self.clock.monotonic() - start)
+        return seconds
+
+    def sustained_fps(self, func, duration, prepare=None):
+        '''calls func(i) back to back for duration real seconds, returns the successful calls per second'''
+        start = self.clock.monotonic()
+        frames = i = 0
+        while self.clock.monotonic() - start < duration:
+            if not prepare is None:
+                prepare()
+            frames += func(i) is True
+            i += 1
+        return round(frames / (self.clock.monotonic() - start), 3)
+
+    def frame_seconds(self):
+        '''measured real seconds per frame back to back over the connection frames are triggered with, None if not calibrated'''
+        fps = self.profile.get('fps', {}).get('serial' if self.use_serial() else 'usb')
+        return None if not fps else 1 / fps
+
+    def arm_seconds(self):
+        '''measured real seconds a shutter change takes (p99), 0 if not calibrated'''
+        shutter = self.profile.get('shutter')
+        return 0 if shutter is None else shutter['p99']
+
+    def usb_interval(self):
+        '''seconds to leave between continuous usb captures. back to back (0) unless calibrating found the camera
+        sustains fewer frames than single captures would allow, then the gap it needed on average'''
+        fps, capture = self.profile.get('fps', {}).get('usb'), self.profile.get('capture', {}).get('usb')
+        if not fps or capture is None:
+            return 0
+        gap = 1 / fps - capture['mean']
+        return gap if gap > 0.1 * capture['mean'] else 0 # otherwise it's the loop's own overhead
+
+    def usb_capture(self):
+        '''takes a photo over usb, setting any staged configs in the same round trip. returns True if it succeeded'''
+        configs = self.take_staged()
+        if configs is None:
+            return usb_trigger_shutter_once(port=self.usb_port, session=self.get_session()) is True
+        sent = self.clock.now_ns()
+        configured, captured = usb_capture_with_config(configs, port=self.usb_port, session=self.get_session())
+        self.staged_result(configs, configured, sent)
+        return captured
+
+    def batches_shutter(self):
+        '''whether shutter changes are staged for the next usb capture rather than set on their own'''
+        return self.batch_usb is True and not self.use_serial()
+
+    def stage_shutter(self, action):
+        '''stages the action's shutter speed to be set along with the next usb capture'''
+        desired_shutter = self.determine_shutter(action)
+        if desired_shutter == self.current_shutter:
+            self.pending_config.pop('shutterspeed', None)
+        else:
+            self.pending_config['shutterspeed'] = desired_shutter
+
+    def staged_result(self, configs, configured, sent):
+        '''takes the outcome of staged configs sent with a capture at sent (nanoseconds). the capture went ahead
+        either way, so configs that failed are staged again for the next one'''
+        if configured:
+            self.current_shutter = configs.get('shutterspeed', self.current_shutter)
+            if not self.frames is None and not self.frame is None and self.frame_count == 0:
+                self.frames.stamp(self.frame, 'shutter_set', sent) # the action's first frame
+        else:
+            logging.warning(f'unable to set {configs} along with a capture on camera {self.camera_id}, retrying with the next one')
+            self.pending_config = dict(configs, **self.pending_config)
+
+    def stamp(self, stage):
+        '''records that the action being processed reached stage now'''
+        if not self.frames is None:
+            self.frames.stamp(self.frame, stage, self.clock.now_ns())
+
+    def bursts(self):
+        '''whether continuous actions fire a pulse train (see serial_burst_capture) rather than holding rts'''
+        return not self.serial_burst_fps is None and self.use_serial() and not self.get_serial() is None
+
+    def record_pulse(self, planned, raised, lowered):
+        '''records a pulse of a serial burst as a frame'''
+        self.record_frame(raised, lowered, planned=planned)
+
+    def record_frame(self, sent, returned, ok=True, planned=None):
+        '''records a frame of the action being processed, triggered at sent and returned at returned (nanoseconds).
+        planned is when a frame after the first was due, if it had an instant of its own (a pulse of a burst)'''
+        event_log.log('frame', self.camera_id, self.active_action, sent=sent, returned=returned, ok=ok)
+        if not self.sync is None:
+            sync, self.sync = self.sync, None
+            sync.fired(self.camera_id, sent)
+        if self.frames is None or self.frame is None:
+            return
+        row = self.frame if self.frame_count == 0 else self.frames.next_frame(self.frame)
+        if not planned is None and self.frame_count > 0:
+            self.frames.stamp(row, 'planned', planned)
+        self.frame_count += 1
+        self.frames.stamp(row, 'trigger_sent', sent)
+        self.frames.stamp(row, 'captured', returned)
+        self.frames.set_outcome(row, 'done' if ok else 'failed')
 
     def determine_shutter(self, action):
-        if action.shutter in allowable_shutters:
-            desired_shutter = action.shutter
-        elif action.shutter in allowable_targets:
-            desired_shutter = get_shutter_speed(action.shutter, self.f_ratio, self.iso, self.enhancement_factor) # calculates the shutter
+        '''returns the shutter speed the action starts with on this camera'''
+        if not action.bracket is None:
+            return self.bracket_shutters(action)[0]
+        return self.lookup_shutter(action.shutter)
+
+    def lookup_shutter(self, shutter):
+        '''returns the shutter string for a shutter speed or target on this camera'''
+        if shutter in allowable_shutters:
+            desired_shutter = shutter
+        elif shutter in allowable_targets:
+            desired_shutter = self.get_exposure_table()[shutter] # calculated shutter, see get_shutter_speed
         else:
-            desired_shutter = action.shutter # attempt to use whatever is given, even if potentially invalid
+            desired_shutter = shutter # attempt to use whatever is given, even if potentially invalid
         return desired_shutter
 
+    def bracket_shutters(self, action):
+        '''returns the shutter strings of the action's bracket on this camera, expanded once (until the enhancement
+        factor changes). targets and shutter speeds are looked up like a shutter, numbers are stops (doublings of
+        the exposure) from the action's own shutter, snapped to the nearest allowable shutter'''
+        shutters = self.bracket_table.get(id(action))
+        if shutters is None:
+            base = shutter_seconds.get(self.lookup_shutter(action.shutter))
+            shutters = []
+            for step in action.bracket:
+                if isinstance(step, str):
+                    shutters.append(self.lookup_shutter(step))
+                elif base is None:
+                    logging.warning(f'unable to bracket {step} stops from shutter {action.shutter} of {action}, using it as is')
+                    shutters.append(action.shutter)
+                else:
+                    shutters.append(str(snap_shutters(base * 2**step)))
+            self.bracket_table[id(action)] = shutters
+        return shutters
+
+    def bracket_running(self, action, taken):
+        '''whether to take another frame of the action's bracket, taken frames in. continuous actions repeat
+        the bracket until they are over, others take it once'''
+        if self.preempt.is_set():
+            return False
+        if action.is_continuous():
+            return action.is_active()
+        return taken < len(action.bracket)
+
+    def bracket_done(self, action, taken):
+        logging.info(f'{taken // len(action.bracket)} full brackets ({taken} frames) of {action} on camera {self.camera_id}')
+
+    def take_bracket(self, action):
+        '''takes the action's bracket one frame per shutter speed, in a loop with no queueing between frames. on usb
+        cameras each shutter change is sent in the same round trip as its capture'''
+        for shutter in self.bracket_frames(action):
+            sent = self.clock.now_ns()
+            ok = self.bracket_frame(shutter)
+            self.record_frame(sent, self.clock.now_ns(), ok)
+
+    def bracket_frame(self, shutter):
+        '''takes a single frame at shutter, returns True if it succeeded'''
+        if self.stages_bracket(shutter):
+            self.set_shutter_speed(shutter)
+        trigger = self.get_serial() if self.use_serial() else None
+        if trigger is None:
+            return self.usb_capture()
+        trigger.wait_ready()
+        serial_trigger_shutter_once(self.serial_port, baud=self.baud, interval=self.pulse_width, timeout=0.1, trigger=trigger)
+        return True
+
     def set_shutter(self, action):
         '''attempts to set the shutter, return True if successful, False if Failure'''
-        desired_shutter = self.determine_shutter(action)
+        return self.set_shutter_speed(self.determine_shutter(action))
+
+    def set_shutter_speed(self, desired_shutter):
         if desired_shutter == self.current_shutter:
             return True
-        success = set_camera_shutter_speed(desired_shutter, usb_port=self.usb_port, timeout=self.shutter_timeout)
+        success = set_camera_shutter_speed(desired_shutter, usb_port=self.usb_port, timeout=self.shutter_timeout, session=self.get_session())
         if success is True:
             self.current_shutter = desired_shutter
         return success
 
-def serial_trigger_shutter_once(port, baud=9600, interval=0.2, timeout=0.1):
-    logging.info(f'taking single photo using serial port: {port}, baud: {baud}, interval: {interval}, timeout: {timeout}')
+class SerialTrigger():
+    '''a serial port held open for the whole run, releasing the shutter with rts pulses.
+    pulse_width is how long rts is held, pulse_period the minimum time between the start of two pulses'''
+    def __init__(self, port, baud=9600, pulse_width=0.1, pulse_period=1.0, clock=None):
+        self.clock = Clock() if clock is None else clock
+        self.port = port
+        self.baud = baud
+        self.pulse_width = pulse_width
+        self.pulse_period = pulse_period
+        self.ser = None
+        self.last_pulse = None # clock.monotonic() at the start of the last pulse
+
+    def open(self):
+        try:
+            self.ser = serial.Serial(self.port, self.baud, timeout=0.1)
+            self.ser.rts = False
+        except (serial.SerialException, OSError) as e:
+            logging.warning(f'unable to open serial port {self.port}: {e}')
+            self.ser = None
+            return False
+        logging.info(f'opened serial port {self.port}, baud: {self.baud}, pulse width: {self.pulse_width}, pulse period: {self.pulse_period}')
+        return True
+
+    def pulse(self, width=None):
+        '''holds rts for width seconds, waiting first if the previous pulse was less than pulse_period ago'''
+        width = self.pulse_width if width is None else width
+        self.wait_ready()
+        self.last_pulse = self.clock.monotonic()
+        self.ser.rts = True
+        self.clock.sleep(width)
+        self.ser.rts = False
+
+    def wait_ready(self):
+        '''waits until pulse_period has passed since the previous pulse'''
+        if not self.last_pulse is None:
+            self.clock.sleep(self.last_pulse + self.pulse_period - self.clock.monotonic())
+
+    async def wait_ready_async(self):
+        if not self.last_pulse is None:
+            await self.clock.wait_async(None, self.last_pulse + self.pulse_period - self.clock.monotonic())
+
+    async def pulse_async(self, width=None):
+        '''pulse() for the asyncio engine, waiting with asyncio sleeps instead of blocking'''
+        width = self.pulse_width if width is None else width
+        await self.wait_ready_async()
+        self.last_pulse = self.clock.monotonic()
+        self.ser.rts = True
+        await self.clock.wait_async(None, width)
+        self.ser.rts = False
+
+    def wait_monotonic(self, when, stop=None, spin=0.001, over=None):
+        '''waits until clock.monotonic() reaches when, sleeping coarsely then spinning for the last spin seconds.
+        returns False early if stop (a threading.Event) is set or over() turns True, checked every 10ms'''
+        while True:
+            if (not stop is None and stop.is_set()) or (not over is None and over()):
+                return False
+            remaining = when - self.clock.monotonic()
+            if remaining <= spin:
+                break
+            self.clock.wait(stop, min(remaining - spin, 0.01))
+        while self.clock.monotonic() < when:
+            if not stop is None and stop.is_set():
+                return False
+        return True
+
+    def burst(self, fps, width, over, stop=None, on_pulse=None, spin=0.001, stamp=None, remaining=None):
+        '''fires rts pulses width seconds long, fps times a second from now, until over() is True or stop is set.
+        they're timed on the trigger's clock, real seconds for a real port. a pulse less than half a period late is
+        still fired, later ones are skipped, and a pulse still held when over() turns True is cut short. remaining(),
+        if given, is the seconds on the trigger's clock until the burst ends: no pulse due at or after that is
+        fired, and the last one is lowered at it. on_pulse(late, raised, lowered) gets the seconds each pulse
+        was late and stamp() at its edges'''
+        stamp = (lambda: int(self.clock.monotonic() * 1e9)) if stamp is None else stamp
+        period = 1 / fps
+        first = self.clock.monotonic()
+        k = 0
+        try:
+            while True:
+                k = max(k, -int(-(self.clock.monotonic() - first - period / 2) // period)) # skip pulses too late to fire
+                due = first + k * period
+                if not remaining is None and due >= self.clock.monotonic() + remaining():
+                    break # would rise at or after the end
+                if not self.wait_monotonic(due, stop, spin, over) or over():
+                    break # over() isn't polled while spinning, so it's checked again right before raising
+                self.hold()
+                raised = stamp()
+                self.last_pulse = self.clock.monotonic() # so single shots after the burst still respect pulse_period
+                late = self.last_pulse - due
+                lowered = self.last_pulse + width
+                if not remaining is None:
+                    lowered = min(lowered, self.last_pulse + remaining())
+                self.wait_monotonic(lowered, stop, spin, over)
+                self.release()
+                if not on_pulse is None:
+                    on_pulse(late, raised, stamp())
+                k += 1
+        finally:
+            self.release()
+
+    def hold(self):
+        self.ser.rts = True
+
+    def release(self):
+        self.ser.rts = False
+
+    def close(self):
+        if self.ser is None:
+            return
+        try:
+            self.ser.rts = False
+            self.ser.close()
+        except (serial.SerialException, OSError) as e:
+            logging.warning(f'error closing serial port {self.port}: {e}')
+        self.ser = None
+
+
+def serial_trigger_shutter_once(port, baud=9600, interval=0.2, timeout=0.1, trigger=None):
+    event_log.log('serial trigger', port=port, baud=baud, width=interval)
+    if not trigger is None:
+        trigger.pulse(interval) # rate limited by the trigger's pulse_period
+        event_log.log('serial triggered', port=port)
+        return
     with serial.Serial(port, baud, timeout=timeout) as ser:
         ser.rts = True
         time.sleep(interval)
     ser.close()
-    logging.info(f'completed single photo using serial port: {port}, baud: {baud}, interval: {interval}, timeout: {timeout}')
+    event_log.log('serial triggered', port=port)
     time.sleep(1.0) # keeps from multiple triggers during the same second
 
-def usb_trigger_shutter_once(port=None):
+def usb_trigger_shutter_once(port=None, session=None):
     '''triggers the shutter via usb (much slower than serial)'''
-    logging.info(f'taking single photo using usb port: {port}')
+    event_log.log('usb trigger', port=port)
+    if not session is None:
+        if session.capture():
+            return True
+        logging.warning('Failed to take usb photo on port: {}!: {}'.format(port, session.last_output))
+        warnings.warn('Failed to take usb photo on port: {}!: {}'.format(port, session.last_output))
+        return False
     try:
         if port is None:
             result = subprocess.run(['gphoto2', '--capture-image'], stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
@@ -1039,42 +3408,118 @@ def usb_trigger_shutter_once(port=None):
         logging.warning(f'An error occurred while attempting to take photo over usb: {e}')
         warnings.warn(f'An error occurred while attempting to take photo over usb: {e}')
 
-def serial_continuous_capture(action, port='/dev/tty.usbserial-10', baud=9600, timeout=None):
+def serial_burst_capture(action, trigger, fps, width, stop=None, clock=None, on_pulse=None, spin=0.001):
+    '''fires a train of rts pulses, width seconds long, fps times a second until the action is over or stop (a
+    threading.Event) is set. the first pulse is on a fixed grid from the action's start on the eclipse clock, so a
+    resumed burst keeps its cadence, and is timed with Clock.wait_until. after that the pulses are timed by the
+    trigger (see SerialTrigger.burst), so a real camera gets real pulse widths whatever the eclipse clock's rate.
+    none starts at or after the action's end and the last is cut short at it. on_pulse(planned, raised, lowered)
+    is called with the eclipse nanoseconds of every pulse'''
+    stop = threading.Event() if stop is None else stop
+    clock = Clock() if clock is None else clock
+    on_pulse = (lambda planned, raised, lowered: None) if on_pulse is None else on_pulse
+    period = int(1e9 / fps * clock.rate / trigger.clock.rate) # eclipse nanoseconds between pulses
+    start, end = action.start_ns, action.end_ns
+    errors = [] # real nanoseconds each pulse was raised after it was due
+    event_log.log('serial burst', action=action, port=trigger.port, fps=fps, width=width)
+    def pulsed(late, raised, lowered):
+        errors.append(int(late * 1e9))
+        on_pulse(raised - int(late * 1e9 * clock.rate / trigger.clock.rate), raised, lowered)
+    while not stop.is_set():
+        now = clock.now_ns() - period // 2 # a pulse less than half a period late is still fired, late
+        planned = start + max(0, -(-(now - start) // period)) * period # next instant on the grid
+        if planned >= end:
+            break
+        if clock.wait_until(int(planned), stop, spin): # otherwise stopped, or the clock jumped
+            remaining = lambda: (end - clock.now_ns()) / 1e9 / clock.rate * trigger.clock.rate # trigger seconds to the end
+            trigger.burst(fps, width, over=lambda: clock.now_ns() >= end, stop=stop, on_pulse=pulsed, spin=spin, stamp=clock.now_ns,
+                remaining=remaining)
+            break
+    if errors:
+        event_log.log('serial burst done', action=action, port=trigger.port, pulses=len(errors),
+            mean_error_us=round(sum(errors) / len(errors) / 1e3, 1), max_error_us=round(max(errors) / 1e3, 1))
+    else:
+        event_log.log('serial burst done', action=action, port=trigger.port, pulses=0)
+
+def serial_continuous_capture(action, port='/dev/tty.usbserial-10', baud=9600, timeout=None, trigger=None, stop=None, clock=None):
+    '''holds the shutter until the action is over, or stop (a threading.Event) is set. waits on the eclipse clock'''
+    stop = threading.Event() if stop is None else stop
+    clock = Clock() if clock is None else clock
     # Open the serial port
-    logging.info(f'Initiating continuous photo using serial on port: {port}, baud: {baud}, timeout: {timeout}')
+    event_log.log('serial hold', action=action, port=port, baud=baud)
+    if not trigger is None:
+        trigger.hold() # Send the "ON" command to trigger the shutter
+        try:
+            while action.is_active() and not stop.is_set(): # Wait for the desired duration of the shutter press
+                clock.wait(stop, action.time_left()) # returns early if the clock jumps, then re-check
+        finally:
+            trigger.release()
+        event_log.log('serial release', action=action, port=port)
+        return
     with serial.Serial(port, baud, timeout=timeout) as ser:
         ser.rts = True # Send the "ON" command to trigger the shutter
-        while action.is_active(): # Wait for the desired duration of the shutter press
-            time.sleep(0.1) # to keep from spamming time check
+        while action.is_active() and not stop.is_set(): # Wait for the desired duration of the shutter press
+            clock.wait(stop, action.time_left()) # returns early if the clock jumps, then re-check
         ser.rts = False
         ser.close()
-    logging.info(f'Completed continuous photo')
-
-def usb_continuous_capture(action, port=None, interval=0):
-    '''takes photos continuously until the action is over'''
-    while action.is_active():
+    event_log.log('serial release', action=action, port=port)
+
+def usb_continuous_capture(action, port=None, interval=0, session=None, stop=None, clock=None, on_frame=None, capture=None):
+    '''takes photos continuously until the action is over, or stop (a threading.Event) is set.
+    interval is in eclipse seconds on clock. on_frame(sent, returned, ok) is called for every frame.
+    capture(), if given, takes each frame and returns True if it succeeded, instead of the session or a process'''
+    stop = threading.Event() if stop is None else stop
+    clock = Clock() if clock is None else clock
+    on_frame = (lambda sent, returned, ok: None) if on_frame is None else on_frame
+    while action.is_active() and not stop.is_set():
+        sent = clock.now_ns()
+        if not capture is None:
+            ok = capture()
+            on_frame(sent, clock.now_ns(), ok)
+            if not ok:
+                warnings.warn('Issue with taking photo via usb on port: {}'.format(port))
+            clock.wait(stop, interval)
+            continue
+        if not session is None:
+            ok = session.capture()
+            on_frame(sent, clock.now_ns(), ok)
+            if not ok:
+                warnings.warn('Issue with taking photo via usb: {}'.format(session.last_output))
+            clock.wait(stop, interval)
+            continue
         if port is None:
             result = subprocess.run(['gphoto2', '--capture-image'], stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
         else:
             result = subprocess.run(['gphoto2', '--port', port, '--capture-image'], stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+        on_frame(sent, clock.now_ns(), result.returncode == 0)
         if not result.returncode == 0:
             warnings.warn('Issue with taking photo via usb: {}'.format(result.stderr))
-        time.sleep(interval)  # Wait before taking the next photo
+        clock.wait(stop, interval)  # Wait before taking the next photo
+
+def set_camera_shutter_speed(shutter_speed, usb_port=None, timeout=5, session=None):
+    return set_camera_config({'shutterspeed': shutter_speed}, usb_port=usb_port, timeout=timeout, session=session)
 
-def set_camera_shutter_speed(shutter_speed, usb_port=None, timeout=5):
+def set_camera_config(configs, usb_port=None, timeout=5, session=None):
+    '''sets every name: value in configs in one call (one shell batch, or one gphoto2 process), retrying what
+    failed until timeout. returns True if all of them were set'''
     start_time = time.time()  # Capture the start time
     while True:
         # Check if the current time has exceeded the start time by the timeout duration
         if time.time() - start_time > timeout:
-            logging.warning('Timeout exceeded while trying to set shutter speed.')
-            warnings.warn('Timeout exceeded while trying to set shutter speed.')
+            logging.warning(f'Timeout exceeded while trying to set {", ".join(configs)}.')
+            warnings.warn(f'Timeout exceeded while trying to set {", ".join(configs)}.')
             return False
+        if not session is None:
+            results = session.batch([f'set-config {name}={value}' for name, value in configs.items()])
+            if all(results):
+                return True
+            configs = {name: value for (name, value), ok in zip(configs.items(), results) if not ok}
+            if not session.is_alive():
+                session = None # the session died, retry with a process per command
+            time.sleep(0.01)
+            continue
         try:
-            if usb_port is None:
-                command = ['gphoto2', '--set-config', f'shutterspeed={shutter_speed}']
-            else:
-                command = ['gphoto2', '--port', usb_port, '--set-config', f'shutterspeed={shutter_speed}']
-            result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+            result = subprocess.run(gphoto2_args(usb_port, configs), stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
             # Check if the command was successful
             if result.returncode == 0:
                 return True
@@ -1084,6 +3529,370 @@ def set_camera_shutter_speed(shutter_speed, usb_port=None, timeout=5):
             warnings.warn(f'An exception occurred: {e}')
             return False
 
+def gphoto2_args(port=None, configs=None, capture=False):
+    '''returns the command line of a single gphoto2 process that sets each name: value in configs, in order,
+    then captures if capture is True. gphoto2 stops at the first of them that fails'''
+    args = ['gphoto2'] if port is None else ['gphoto2', '--port', port]
+    for name, value in ({} if configs is None else configs).items():
+        args += ['--set-config', f'{name}={value}']
+    if capture is True:
+        args.append('--capture-image')
+    return args
+
+def usb_capture_with_config(configs, port=None, session=None):
+    '''sets each name: value in configs and captures in the same round trip, as one shell batch or one gphoto2
+    process instead of one per command. returns (whether every config was set, whether the capture succeeded)'''
+    event_log.log('usb trigger', port=port, configs=configs)
+    if not session is None:
+        results = session.batch([f'set-config {name}={value}' for name, value in configs.items()] + ['capture-image'])
+        if not results[-1]:
+            logging.warning('Failed to take usb photo on port: {}!: {}'.format(port, session.last_output))
+        return all(results[:-1]), results[-1]
+    try:
+        result = subprocess.run(gphoto2_args(port, configs, capture=True), stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+    except Exception as e:
+        logging.warning(f'An error occurred while attempting to take photo over usb: {e}')
+        return False, False
+    if result.returncode == 0:
+        return True, True
+    # gphoto2 stops at the first failure, so the capture may not have happened. the frame matters more, so capture
+    # on its own straight away, then find out whether the configs can be set
+    logging.warning('Failed to set {} and take usb photo on port: {}!: {}, capturing on its own'.format(configs, port, result.stderr))
+    captured = usb_trigger_shutter_once(port=port) is True
+    configured = subprocess.run(gphoto2_args(port, configs), stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True).returncode == 0
+    return configured, captured
+
+class GphotoSession():
+    '''a long-lived `gphoto2 --shell` child for one camera. keeps the usb/ptp connection open, so each
+    capture or set-config is a line written to its stdin instead of a new process re-opening the camera'''
+    prompt = re.compile(r'gphoto2: \{[^}]*\}[^\n]*> ')
+
+    def __init__(self, port=None, name=None, timeout=30):
+        self.port = port
+        self.name = name
+        self.timeout = timeout # max seconds to wait for a single command
+        self.proc = None
+        self.buffer = ''
+        self.last_output = ''
+        self.latencies = {} # command name (names joined by + for a batch): list of seconds each call took
+        self.round_trips = 0 # writes to the shell that were waited on, a batch of commands is one
+        self.commands = 0 # shell commands sent, each would be a round trip of its own without batching
+        self.cond = threading.Condition()
+        self.lock = threading.Lock() # one command in flight at a time
+        self.reader = None
+
+    def start(self):
+        '''starts the shell and waits for its first prompt, returns True if successful'''
+        command = ['gphoto2', '--shell'] if self.port is None else ['gphoto2', '--port', self.port, '--shell']
+        try:
+            self.proc = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, bufsize=0)
+        except Exception as e:
+            logging.warning(f'unable to start gphoto2 shell for {self.name}: {e}')
+            return False
+        self.reader = threading.Thread(target=self.read_output, args=(self.proc.stdout,), name=f'{self.name} gphoto2 reader', daemon=True)
+        self.reader.start()
+        ok, output = self.wait_for_prompt(time.perf_counter() + self.timeout)
+        if not ok:
+            logging.warning(f'gphoto2 shell for {self.name} did not respond: {output}')
+            self.close()
+            return False
+        logging.info(f'started gphoto2 shell for {self.name} on port {self.port}')
+        return True
+
+    def read_output(self, stdout):
+        '''reader thread, appends everything the shell prints to the buffer'''
+        while True:
+            chunk = stdout.read1(4096) if hasattr(stdout, 'read1') else stdout.read(1)
+            with self.cond:
+                if not chunk:
+                    self.cond.notify_all()
+                    return
+                self.buffer += chunk.decode(errors='replace')
+                self.cond.notify_all()
+
+    def wait_for_prompt(self, deadline):
+        '''waits until the shell prints its prompt, returns (success, output printed before the prompt)'''
+        with self.cond:
+            while True:
+                match = self.prompt.search(self.buffer)
+                if match:
+                    output = self.buffer[:match.start()]
+                    self.buffer = self.buffer[match.end():]
+                    return True, output
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0 or not self.is_alive():
+                    return False, self.buffer
+                self.cond.wait(remaining)
+
+    def is_alive(self):
+        return not self.proc is None and self.proc.poll() is None
+
+    def command(self, line):
+        '''sends a single shell command and waits for it to finish, returns True if it succeeded'''
+        return self.batch([line])[0]
+
+    def batch(self, lines):
+        '''sends several shell commands in one write and waits for each of their prompts, so they cost one
+        round trip rather than one each. the shell runs them in order whether or not an earlier one failed.
+        returns a list of True/False, whether each line succeeded'''
+        results = [False] * len(lines)
+        with self.lock:
+            if not self.is_alive():
+                self.last_output = 'gphoto2 shell is not running'
+                return results
+            start = time.perf_counter()
+            try:
+                self.proc.stdin.write(''.join(line + '\n' for line in lines).encode())
+                self.proc.stdin.flush()
+            except (BrokenPipeError, OSError) as e:
+                self.last_output = str(e)
+                return results
+            self.round_trips += 1
+            self.commands += len(lines)
+            outputs = []
+            for i, line in enumerate(lines):
+                ok, output = self.wait_for_prompt(time.perf_counter() + self.timeout)
+                outputs.append(output.strip())
+                if not ok:
+                    break
+                results[i] = not '*** Error' in output
+            elapsed = time.perf_counter() - start
+        self.latencies.setdefault('+'.join(line.split()[0] for line in lines), []).append(elapsed)
+        self.last_output = '\n'.join(outputs)
+        if not ok:
+            logging.warning(f'gphoto2 shell for {self.name} timed out on "{line}", restarting it on next use')
+            self.close()
+            return results
+        for line, result, output in zip(lines, results, outputs):
+            if not result:
+                logging.warning(f'gphoto2 shell for {self.name} failed "{line}" in {elapsed:.3f}s: {output}')
+        event_log.log('gphoto2', self.name, level=logging.DEBUG, command='; '.join(lines), seconds=round(elapsed, 4))
+        return results
+
+    def capture(self):
+        return self.command('capture-image')
+
+    def set_config(self, name, value):
+        return self.command(f'set-config {name}={value}')
+
+    def latency_summary(self):
+        '''returns a dict of command name: (count, mean, max) latency in seconds, and the round trips batching saved'''
+        summary = {name: (len(l), round(sum(l) / len(l), 4), round(max(l), 4)) for name, l in self.latencies.items()}
+        summary['round trips'] = (self.round_trips, self.commands - self.round_trips) # made, saved by batching
+        return summary
+
+    def close(self):
+        if self.proc is None:
+            return
+        try:
+            if self.proc.poll() is None:
+                self.proc.stdin.write(b'exit\n')
+                self.proc.stdin.flush()
+                self.proc.wait(timeout=2)
+        except Exception:
+            self.proc.kill()
+        self.proc = None
+
+
+class AsyncGphotoSession(GphotoSession):
+    '''GphotoSession for the asyncio engine. the shell is an asyncio subprocess, so commands are awaited
+    and no reader thread is needed. capture() and set_config() return coroutines'''
+    async def start(self):
+        command = ['gphoto2', '--shell'] if self.port is None else ['gphoto2', '--port', self.port, '--shell']
+        try:
+            self.proc = await asyncio.create_subprocess_exec(*command, stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT)
+        except Exception as e:
+            logging.warning(f'unable to start gphoto2 shell for {self.name}: {e}')
+            return False
+        self.lock = asyncio.Lock()
+        ok, output = await self.wait_for_prompt(time.perf_counter() + self.timeout)
+        if not ok:
+            logging.warning(f'gphoto2 shell for {self.name} did not respond: {output}')
+            await self.close()
+            return False
+        logging.info(f'started gphoto2 shell for {self.name} on port {self.port}')
+        return True
+
+    async def wait_for_prompt(self, deadline):
+        while True:
+            match = self.prompt.search(self.buffer)
+            if match:
+                output = self.buffer[:match.start()]
+                self.buffer = self.buffer[match.end():]
+                return True, output
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                return False, self.buffer
+            try:
+                chunk = await asyncio.wait_for(self.proc.stdout.read(4096), remaining)
+            except asyncio.TimeoutError:
+                return False, self.buffer
+            if not chunk:
+                return False, self.buffer
+            self.buffer += chunk.decode(errors='replace')
+
+    def is_alive(self):
+        return not self.proc is None and self.proc.returncode is None
+
+    async def command(self, line):
+        return (await self.batch([line]))[0]
+
+    async def batch(self, lines):
+        results = [False] * len(lines)
+        async with self.lock:
+            if not self.is_alive():
+                self.last_output = 'gphoto2 shell is not running'
+                return results
+            start = time.perf_counter()
+            self.proc.stdin.write(''.join(line + '\n' for line in lines).encode())
+            try:
+                await self.proc.stdin.drain()
+            except (BrokenPipeError, ConnectionResetError) as e:
+                self.last_output = str(e)
+                return results
+            self.round_trips += 1
+            self.commands += len(lines)
+            outputs = []
+            for i, line in enumerate(lines):
+                ok, output = await self.wait_for_prompt(time.perf_counter() + self.timeout)
+                outputs.append(output.strip())
+                if not ok:
+                    break
+                results[i] = not '*** Error' in output
+            elapsed = time.perf_counter() - start
+        self.latencies.setdefault('+'.join(line.split()[0] for line in lines), []).append(elapsed)
+        self.last_output = '\n'.join(outputs)
+        if not ok:
+            logging.warning(f'gphoto2 shell for {self.name} timed out on "{line}"')
+            await self.close()
+            return results
+        for line, result, output in zip(lines, results, outputs):
+            if not result:
+                logging.warning(f'gphoto2 shell for {self.name} failed "{line}" in {elapsed:.3f}s: {output}')
+        event_log.log('gphoto2', self.name, level=logging.DEBUG, command='; '.join(lines), seconds=round(elapsed, 4))
+        return results
+
+    async def close(self):
+        if self.proc is None:
+            return
+        try:
+            if self.proc.returncode is None:
+                self.proc.stdin.write(b'exit\n')
+                await self.proc.stdin.drain()
+                await asyncio.wait_for(self.proc.wait(), 2)
+        except Exception:
+            self.proc.kill()
+        self.proc = None
+
+
+class SimulatedGphotoSession(GphotoSession):
+    '''stands in for a usb camera's GphotoSession with no hardware attached. each command waits out a
+    latency (in eclipse seconds, on the given clock) drawn from a simple model, and may fail at random. round_trip
+    is the part of each latency spent getting the command to the camera and back, paid once by a batch.
+    every successful capture is recorded in camera.captures with the camera's active action'''
+    def __init__(self, camera, clock, capture=0.3, set_config=0.15, round_trip=0.05, jitter=0.02, failure_rate=0.0, burst_fps=5.0, seed=None):
+        super().__init__(port=camera.usb_port, name=camera.camera_id)
+        self.camera = camera
+        self.clock = clock
+        self.model = {'capture-image': capture, 'set-config': set_config} # mean seconds per command
+        self.round_trip = round_trip
+        self.jitter = jitter # standard deviation of the latency, in seconds
+        self.failure_rate = failure_rate # probability that a command fails
+        self.random = random.Random(seed)
+        self.alive = False
+
+    def start(self):
+        self.alive = True
+        return True
+
+    def is_alive(self):
+        return self.alive
+
+    def batch(self, lines):
+        names = [line.split()[0] for line in lines]
+        results = []
+        self.round_trips += 1
+        self.commands += len(lines)
+        total = 0.0
+        for i, name in enumerate(names):
+            latency = max(0.0, self.random.gauss(self.model.get(name, 0.0), self.jitter))
+            if i > 0:
+                latency = max(0.0, latency - self.round_trip) # the rest of a batch rides on the first command's round trip
+            self.clock.sleep(latency)
+            total += latency
+            results.append(not self.random.random() < self.failure_rate)
+            if name == 'capture-image' and results[-1]:
+                self.camera.captures.append((self.clock.now(), self.camera.active_action))
+        self.latencies.setdefault('+'.join(names), []).append(total)
+        self.last_output = '' if all(results) else '*** Error (simulated failure) ***'
+        return results
+
+    def close(self):
+        self.alive = False
+
+
+class SimulatedAsyncSession():
+    '''lets the asyncio engine drive a SimulatedGphotoSession, running its blocking commands in a thread'''
+    def __init__(self, session):
+        self.session = session
+
+    def is_alive(self):
+        return self.session.is_alive()
+
+    async def command(self, line):
+        return await asyncio.to_thread(self.session.command, line)
+
+    async def batch(self, lines):
+        return await asyncio.to_thread(self.session.batch, lines)
+
+    def latency_summary(self):
+        return self.session.latency_summary()
+
+    async def close(self):
+        self.session.close()
+
+
+class SimulatedSerialPort():
+    '''records the rts line of a SimulatedSerialTrigger. while rts is held the simulated camera fires
+    in its burst drive mode at burst_fps, a short pulse fires a single frame'''
+    def __init__(self, trigger):
+        self.trigger = trigger
+        self.raised = None # datetime rts was raised
+        self._rts = False
+
+    @property
+    def rts(self):
+        return self._rts
+
+    @rts.setter
+    def rts(self, value):
+        trigger = self.trigger
+        if value and not self._rts:
+            self.raised = trigger.clock.now()
+        elif not value and self._rts:
+            held = (trigger.clock.now() - self.raised).total_seconds()
+            frames = 1 + int(held * trigger.burst_fps)
+            for i in range(frames):
+                trigger.camera.captures.append((self.raised + datetime.timedelta(seconds=i / trigger.burst_fps), trigger.camera.active_action))
+        self._rts = value
+
+    def close(self):
+        pass
+
+
+class SimulatedSerialTrigger(SerialTrigger):
+    '''SerialTrigger with no serial port behind it, see SimulatedSerialPort'''
+    def __init__(self, camera, clock, burst_fps=5.0, **latency_model):
+        super().__init__(camera.serial_port, baud=camera.baud, pulse_width=camera.pulse_width, pulse_period=camera.pulse_period, clock=clock)
+        self.camera = camera
+        self.burst_fps = burst_fps
+
+    def open(self):
+        self.ser = SimulatedSerialPort(self)
+        return True
+
+
 def query_for_usb_cameras():
     '''returns a dict of camera: usb_port pairs'''
     p = subprocess.run(['gphoto2', '--auto-detect'], stdout=subprocess.PIPE, universal_newlines=True)
@@ -1091,10 +3900,31 @@ def query_for_usb_cameras():
         r = re.compile(r'^(.*?)   +(usb:\S*)\s', re.MULTILINE)
         matches = r.findall(p.stdout)
         cameras = {model: usb for model, usb in matches}
+        logging.info('Found usb cameras: {}'.format(cameras))
         return cameras
-    logging.info('Found usb cameras: {}'.format(cameras))
+    logging.warning('gphoto2 --auto-detect failed, no usb cameras found')
     return {}
 
+epoch = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+def to_ns(dt):
+    '''returns the integer nanoseconds since the epoch of a timezone aware datetime'''
+    return (dt - epoch) // datetime.timedelta(microseconds=1) * 1000
+
+def from_ns(ns, tzinfo=None):
+    '''returns the datetime (in tzinfo, local time by default) of integer nanoseconds since the epoch'''
+    return (epoch + datetime.timedelta(microseconds=int(ns) // 1000)).astimezone(tzinfo)
+
+def intern(value):
+    '''interns strings (repeated json values are otherwise held once per action), leaves anything else as it is'''
+    return sys.intern(value) if isinstance(value, str) else value
+
+def as_ns(value):
+    '''accepts either a datetime or integer nanoseconds, returns integer nanoseconds'''
+    if isinstance(value, datetime.datetime):
+        return to_ns(value)
+    return int(value)
+
 def print_datetime_info(dt):
     if dt.tzinfo is not None and dt.tzinfo.utcoffset(dt) is not None:
         print(f"Timezone-aware: {dt} with timezone {dt.tzinfo}")
@@ -1120,7 +3950,29 @@ def progressbar(num, length=100, max_sec=300, text_left=True):
     return rich.text.Text(' ' * empty_length, style="on black") + rich.text.Text('#' * filled_length, style='green') + sec
 
 def render_solid(text):
-    return pyfiglet.Figlet(font="banner").renderText(text).replace("#", "█")
+    return render_figlet(text, font='banner').replace("#", "█")
+
+@functools.lru_cache(maxsize=None)
+def get_figlet(font, width=80):
+    '''returns a pyfiglet.Figlet, loading each font (and width) only once'''
+    return pyfiglet.Figlet(font=font, width=width)
+
+glyph_fonts = ('moscow', 'banner') # fonts that set digits, colons and dashes side by side without smushing them
+glyph_chars = set('0123456789:- ')
+
+@functools.lru_cache(maxsize=None)
+def get_glyph(font, char):
+    '''returns the rows of a single character's big text'''
+    return get_figlet(font, 1000).renderText(char).split('\n')
+
+def render_figlet(text, font='moscow', width=80):
+    '''returns the big text rendering of text. the clock and countdown change every second, so rather than render
+    each string they're put together from cached glyphs. anything else, or text wider than width, goes through figlet'''
+    if font in glyph_fonts and text and set(text) <= glyph_chars:
+        glyphs = [get_glyph(font, char) for char in text]
+        if sum(len(glyph[1]) for glyph in glyphs) < width:
+            return '\n'.join(''.join(glyph[row] for glyph in glyphs) for row in range(len(glyphs[0])))
+    return get_figlet(font, width).renderText(text)
 
 def format_time(tim):
     if tim is None:
@@ -1199,12 +4051,29 @@ def say(text, voice=None):
     thread = threading.Thread(target=target)
     thread.start()
 
+# brightness exponent Q for each target
+qmap = {'Partial, ND 4.0': 11, 'Partial, ND 5.0': 8, 'Baily\'s Beads': 12, 'Chromosphere': 11, 'Prominences': 9, 'Corona - 0.1 Rs': 7,
+    'Corona - 0.2 Rs': 5, 'Corona - 0.5 Rs': 3, 'Corona - 1.0 Rs': 1, 'Corona - 2.0 Rs': 0, 'Corona - 4.0 Rs': -1, 'Corona - 8.0 Rs': -3}
+
 def get_Q(target):
     '''get's the brightness exponent Q for the given target'''
-    qmap = {'Partial, ND 4.0': 11, 'Partial, ND 5.0': 8, 'Baily\'s Beads': 12, 'Chromosphere': 11, 'Prominences': 9, 'Corona - 0.1 Rs': 7,
-        'Corona - 0.2 Rs': 5, 'Corona - 0.5 Rs': 3, 'Corona - 1.0 Rs': 1, 'Corona - 2.0 Rs': 0, 'Corona - 4.0 Rs': -1, 'Corona - 8.0 Rs': -3}
     return qmap.get(target, 11)
 
+def snap_shutters(t):
+    '''returns the nearest allowable shutter string for each float time in the array t (ties go to the faster shutter)'''
+    t = np.asarray(t, dtype=np.float64)
+    idx = np.clip(np.searchsorted(shutter_times, t), 1, len(shutter_times) - 1)
+    lower = shutter_times[idx - 1]
+    upper = shutter_times[idx]
+    idx = np.where(upper - t < t - lower, idx, idx - 1)
+    return shutter_strings[idx]
+
+def build_exposure_table(f_ratio, iso, enhancement_factor):
+    '''returns a dict of target: shutter string for every allowable target, see get_shutter_speed'''
+    Q = np.array([get_Q(target) for target in allowable_targets], dtype=np.float64)
+    t = enhancement_factor * f_ratio**2 / (iso * 2**Q)
+    return dict(zip(allowable_targets, snap_shutters(t).tolist()))
+
 def get_shutter_speed(target, f_ratio, iso, enhancement_factor):
     '''returns the appropriate shutter speed string to send to the camera for the given phase
     using the equation referenced @ https://umbra.nascom.nasa.gov/eclipse/980226/tables/table_26.html
@@ -1213,7 +4082,7 @@ def get_shutter_speed(target, f_ratio, iso, enhancement_factor):
     '''
     Q = get_Q(target)
     t = enhancement_factor * f_ratio**2 / (iso * 2**Q) # float time for shutter speed
-    shutter_string = shutters[min(shutters, key=lambda k: abs(k - t))] # determines the shutter string to return, based on the time (picks the nearest)
+    shutter_string = str(snap_shutters(t)) # determines the shutter string to return, based on the time (picks the nearest)
     return shutter_string
 
 def argparser():
@@ -1228,20 +4097,38 @@ def argparser():
     parse.add_argument("--nosound", action='store_true', default=False, help="runs without sound alerts")
     parse.add_argument("--noinput", action='store_true', default=False, help="runs without keyboard input")
     parse.add_argument("--verbose", action='store_true', default=False, help="verbose mode")
+    parse.add_argument("--simulate", action='store_true', default=False, help="runs against simulated cameras, no gphoto2 or serial hardware needed")
+    parse.add_argument('--speed', type=float, default=None, metavar='X', help="runs the eclipse clock X times faster than real time, to rehearse a sequence. space pauses, +/- change the speed and the right arrow jumps to 10 seconds before the next contact time")
+    parse.add_argument('--frames', type=str, default=None, metavar='PATH', help="where to write the per-frame timings (.npz, with a .csv latency summary next to it). Only the per camera summary is logged without it")
+    parse.add_argument('--no_plan_cache', action='store_true', default=False, help="always parse the json, rather than loading the plan cached next to it (<input>.plan) when the json hasn't changed")
+    parse.add_argument('--log_level', default='DEBUG', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'], help="lowest level written to logfile.log. Default is DEBUG")
+    parse.add_argument('--quiet_totality', action='store_true', default=False, help="logs per-trigger events at DEBUG between c2 and c3, so with --log_level INFO they are skipped during totality")
+    parse.add_argument('--profile_startup', '--profile-startup', action='store_true', default=False, help="prints how long each import and initialization phase took, and how long until the main loop was ready and the first camera dispatch, on exit. the total is the startup time, up to the main loop being ready")
+    parse.add_argument('--engine', default='thread', choices=['thread', 'asyncio'], help="camera dispatch engine: one thread per camera (default), or a single asyncio event loop for many cameras")
+    parse.add_argument('--calibrate', action='store_true', default=False, help="measures each camera's shutter change and capture latency and sustained fps (taking frames), writes them to <input>.profile for later runs to plan with, and exits")
     return parse
 
 
 if __name__ == '__main__':
+    timer = StartupTimer(start=import_start)
+    timer.record('import run.py', time.perf_counter() - import_start)
     args = argparser().parse_args() # parse input arguments
+    log_writer = configure_logging('logfile.log', args.log_level) # here rather than on import, so importing run writes nothing
+    if args.calibrate is True:
+        print(calibrate(args.input, simulate=args.simulate).report())
+        sys.exit(0)
     if args.nodisplay is False:
-        import rich
-        import rich.console
-        import rich.layout
-        import rich.align
-        import rich.panel
-        import rich.live
-        import pyfiglet
+        with timer.phase('import display'):
+            import rich
+            import rich.console
+            import rich.layout
+            import rich.align
+            import rich.panel
+            import rich.live
+            import pyfiglet
     if args.noinput is False:
-        from pynput import keyboard 
-    e = EclipseAutomation(test=args.test, inputfile=args.input, nodisplay=args.nodisplay, nosound=args.nosound, noinput=args.noinput, verbose=args.verbose, contact_time=args.contact_time) # instantiate our main objects and run main loop
+        with timer.phase('import keyboard'):
+            from pynput import keyboard
+    clock = None if args.speed is None else VirtualClock(rate=args.speed)
+    e = EclipseAutomation(test=args.test, inputfile=args.input, nodisplay=args.nodisplay, nosound=args.nosound, noinput=args.noinput, verbose=args.verbose, contact_time=args.contact_time, engine=args.engine, simulate=args.simulate, clock=clock, frames=args.frames, quiet_totality=args.quiet_totality, plan_cache=not args.no_plan_cache, timer=timer, profile_startup=args.profile_startup) # instantiate our main objects and run main loop
     
@@ -0,0 +1,39 @@
+import os
+import sys
+import json
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import run
+
+'''shared fixtures: short sequences around the example's contact times, timed on a VirtualClock'''
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def write_sequence(directory, camera_actions, equipment=None):
+    '''writes example.json with camera_actions (and equipment, one usb camera by default) and no voice actions,
+    returns its path'''
+    with open(os.path.join(root, 'example.json'), 'r') as file:
+        json_obj = json.load(file)
+    json_obj['camera_actions'] = camera_actions
+    json_obj['voice_actions'] = []
+    json_obj['equipment'] = [{'camera_id': 'camera', 'backend': 'simulated'}] if equipment is None else equipment
+    path = os.path.join(directory, 'sequence.json')
+    with open(path, 'w') as file:
+        json.dump(json_obj, file)
+    return path
+
+
+@pytest.fixture
+def sequence(tmp_path):
+    '''returns a function that parses camera_actions into a Timeholder on a VirtualClock, started offset seconds
+    from c2 and running rate times faster than real time'''
+    def parse(camera_actions, offset=-60, rate=1.0, equipment=None):
+        clock = run.VirtualClock(rate=rate)
+        t = run.Timeholder(write_sequence(str(tmp_path), camera_actions, equipment), clock=clock)
+        clock.jump(t.events.get('c2').time_ns + int(offset * 1e9))
+        return t
+    return parse
@@ -0,0 +1,55 @@
+import random
+
+import run
+
+
+class Span():
+    '''the parts of an Action that ActionIndex reads'''
+    def __init__(self, time_ns, lo, hi):
+        self.time_ns = time_ns
+        self.lo, self.hi = lo, hi
+
+    def span(self):
+        return self.lo, self.hi
+
+
+def random_actions(n, seed):
+    rng = random.Random(seed)
+    actions = []
+    for _ in range(n):
+        start = rng.randrange(0, 10_000_000_000)
+        kind = rng.random()
+        if kind < 0.5: # single shot, held for a second
+            actions.append(Span(start, start, start + 1_000_000_000))
+        elif kind < 0.9: # continuous
+            actions.append(Span(start, start, start + rng.randrange(0, 3_000_000_000)))
+        else: # open ended on one side
+            actions.append(Span(None, None, start) if rng.random() < 0.5 else Span(None, start, None))
+    return actions
+
+
+def brute_at(actions, now):
+    return [i for i, a in enumerate(actions) if (a.lo is None or a.lo <= now) and (a.hi is None or now <= a.hi)]
+
+
+def brute_after(actions, now):
+    timed = [i for i, a in enumerate(actions) if not a.time_ns is None and a.time_ns > now]
+    return sorted(timed, key=lambda i: actions[i].time_ns) # stable, so ties stay in list order
+
+
+def test_queries_match_a_scan():
+    actions = random_actions(2000, seed=1)
+    index = run.ActionIndex(actions)
+    rng = random.Random(2)
+    instants = [rng.randrange(-1_000_000_000, 12_000_000_000) for _ in range(300)]
+    instants += [a.lo for a in actions[:100] if not a.lo is None] # on the boundaries
+    for now in instants:
+        assert index.at(now) == brute_at(actions, now)
+        assert list(index.after(now)) == brute_after(actions, now)
+
+
+def test_identical_spans_dont_recurse():
+    actions = [Span(5, 5, 5) for _ in range(5000)] + [Span(None, None, None)]
+    index = run.ActionIndex(actions)
+    assert index.at(5) == list(range(len(actions)))
+    assert index.at(6) == [len(actions) - 1]
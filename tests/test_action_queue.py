@@ -0,0 +1,70 @@
+import threading
+
+import run
+
+single = {'text': 'single', 'shutter': '1/250', 'time': 'c2', 'camera_id': 'camera'}
+hold = {'text': 'hold', 'shutter': '1/250', 'start': 'c2', 'start_offset': -5, 'end': 'c2', 'end_offset': 5, 'camera_id': 'camera'}
+
+
+def run_worker(q):
+    '''runs process_queue on its own thread, returns the thread'''
+    thread = threading.Thread(target=run.process_queue, args=(q, threading.Lock()), daemon=True)
+    thread.start()
+    return thread
+
+
+def test_stale_task_is_dropped(sequence):
+    t = sequence([single], offset=5) # its 1 second window ended 4 seconds ago
+    action, = t.camera_actions.actions
+    q = run.ActionQueue(name='camera')
+    q.put(lambda action: None, action, deadline=action.deadline(action.time_ns))
+    assert q.pop() is None
+    assert q.dropped == 1
+
+
+def test_newer_trigger_replaces_queued_one(sequence):
+    t = sequence([single], offset=0)
+    action, = t.camera_actions.actions
+    q = run.ActionQueue(name='camera')
+    q.put(lambda action: 'older', action)
+    q.put(lambda action: 'newer', action)
+    func, popped, _, _ = q.pop()
+    assert popped is action and func(action) == 'newer'
+    assert q.pop() is None and q.merged == 1
+
+
+def test_higher_priority_preempts_and_resumes_continuous_task(sequence):
+    t = sequence([hold, dict(single, text='urgent', priority=1)], offset=0)
+    continuous, urgent = t.camera_actions.actions
+    q = run.ActionQueue(name='camera')
+    ran = []
+    started = threading.Event()
+    def capture(action):
+        ran.append(action.text)
+        if len(ran) == 1: # holds the shutter until preempted, then returns straight away once resumed
+            started.set()
+            q.preempt.wait(2)
+    q.put(capture, continuous, deadline=continuous.end_ns)
+    worker = run_worker(q)
+    assert started.wait(2)
+    q.put(lambda action: ran.append(action.text), urgent, priority=1)
+    q.close()
+    worker.join(5)
+    assert ran == ['hold', 'urgent', 'hold']
+    assert q.preempted == 1
+
+
+def test_worker_survives_a_failing_action(sequence):
+    t = sequence([single, dict(single, text='next', offset=1)], offset=0)
+    failing, following = t.camera_actions.actions
+    q = run.ActionQueue(name='camera')
+    ran = []
+    def fail(action):
+        raise Exception('camera unplugged')
+    q.put(fail, failing)
+    q.put(lambda action: ran.append(action.text), following)
+    q.close()
+    worker = run_worker(q)
+    worker.join(5)
+    assert ran == ['next']
+    assert q.running is None
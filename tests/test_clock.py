@@ -0,0 +1,65 @@
+import threading
+
+import pytest
+
+import run
+
+
+@pytest.fixture
+def fake_time(monkeypatch):
+    '''replaces the monotonic and wall clocks with counters, advanced together by advance(ns) or apart by
+    stepping 'wall' directly'''
+    now = {'mono': 1_000_000_000_000, 'wall': 1_712_600_000_000_000_000}
+    monkeypatch.setattr(run.time, 'monotonic_ns', lambda: now['mono'])
+    monkeypatch.setattr(run.time, 'time_ns', lambda: now['wall'])
+    def advance(ns):
+        now['mono'] += ns
+        now['wall'] += ns
+    now['advance'] = advance
+    return now
+
+
+@pytest.mark.parametrize('step', [10_000_000_000, -10_000_000_000])
+def test_wall_clock_step_is_slewed(fake_time, step):
+    clock = run.Clock()
+    last = clock.now_ns()
+    fake_time['wall'] += step # ntp or a gps daemon steps the wall clock
+    tick = 100_000_000
+    ticks = []
+    for _ in range(2500): # long enough to slew 10 seconds in at 5%
+        fake_time['advance'](tick)
+        now = clock.now_ns()
+        ticks.append(now - last)
+        last = now
+    assert max(ticks) <= tick * (1 + clock.slew) + 1
+    assert min(ticks) >= tick * (1 - clock.slew) - 1 # never stands still or runs backward
+    assert abs(fake_time['wall'] - clock.now_ns()) < 1_000_000 # caught up with the wall clock
+    assert ticks[-1] == tick
+
+
+def test_virtual_clock_rate_pause_and_jump(fake_time):
+    clock = run.VirtualClock(rate=10, start=0)
+    fake_time['advance'](1_000_000_000)
+    assert clock.now_ns() == 10_000_000_000
+    clock.pause()
+    fake_time['advance'](1_000_000_000)
+    assert clock.now_ns() == 10_000_000_000
+    clock.resume()
+    clock.set_rate(2)
+    fake_time['advance'](1_000_000_000)
+    assert clock.now_ns() == 12_000_000_000
+    assert clock.monotonic() == 12.0 # jumps don't move the monotonic seconds
+    woken = threading.Event()
+    clock.subscribe(woken)
+    clock.jump(100_000_000_000)
+    assert clock.now_ns() == 100_000_000_000 and clock.jumps == 1 and woken.is_set()
+    assert clock.monotonic() == 12.0
+
+
+def test_wait_until_ends_early_when_the_clock_jumps():
+    clock = run.VirtualClock(rate=1)
+    target = clock.now_ns() + 5_000_000_000
+    threading.Timer(0.05, lambda: clock.jump(clock.now_ns() + 1_000_000_000)).start()
+    start = clock.monotonic()
+    assert clock.wait_until(target) is False
+    assert clock.monotonic() - start < 1.5 # ended at the jump, not the 5 seconds to target
@@ -0,0 +1,56 @@
+import datetime
+import pickle
+
+import run
+
+from conftest import write_sequence
+
+single = {'text': 'single', 'shutter': '1/250', 'time': 'c2', 'camera_id': 'camera'}
+
+
+def cached(path):
+    '''parses path with the plan cache on, saving the plan if it wasn't loaded. returns whether it was loaded'''
+    t = run.Timeholder(path, plan_cache=True)
+    hit = not t.timelines is None
+    t.save_plan(t.camera_actions.build_timelines(lambda action: action.camera_id, t.events))
+    return hit
+
+
+def test_key_follows_json_and_timezone(tmp_path):
+    cache = run.PlanCache(str(tmp_path / 'sequence.json'))
+    utc, est = datetime.timezone.utc, datetime.timezone(datetime.timedelta(hours=-5))
+    assert cache.key(b'{}', utc) == cache.key(b'{}', utc)
+    assert cache.key(b'{}', utc) != cache.key(b'{ }', utc)
+    assert cache.key(b'{}', utc) != cache.key(b'{}', est)
+
+
+def test_unchanged_json_hits_and_changed_json_misses(tmp_path):
+    path = write_sequence(str(tmp_path), [single])
+    assert cached(path) is False
+    assert cached(path) is True
+    write_sequence(str(tmp_path), [dict(single, offset=1)])
+    assert cached(path) is False
+    assert cached(path) is True
+
+
+def test_loaded_plan_matches_the_parsed_one(tmp_path):
+    path = write_sequence(str(tmp_path), [single, dict(single, text='later', offset=5)])
+    cached(path)
+    clock = run.VirtualClock(start=0)
+    clock.pause()
+    t = run.Timeholder(path, clock=clock, plan_cache=True)
+    assert [a.text for a in t.camera_actions.actions] == ['single', 'later']
+    assert t.timelines['camera'].times.tolist() == [a.time_ns for a in t.camera_actions.actions]
+    assert t.camera_actions.actions[0].get_now_ns() == clock.now_ns() # bound again to the loading clock
+
+
+def test_dated_plan_from_another_day_misses(tmp_path):
+    cache = run.PlanCache(str(tmp_path / 'sequence.json'))
+    key = cache.key(b'{}', datetime.timezone.utc)
+    cache.save(key, {'plan': 1}, dated=True)
+    assert cache.load(key) == {'plan': 1}
+    with open(cache.path, 'wb') as file:
+        pickle.dump({'key': key, 'date': '2000-01-01'}, file)
+        pickle.dump({'plan': 1}, file)
+    assert cache.load(key) is None
+    assert cache.load('another key') is None
@@ -0,0 +1,55 @@
+import threading
+
+import run
+
+
+def test_callbacks_run_in_deadline_order():
+    clock = run.VirtualClock(rate=10)
+    scheduler = run.Scheduler(clock.now_ns, clock=clock)
+    start = clock.now_ns()
+    ran = []
+    for seconds in (0.3, 0.1, 0.2):
+        scheduler.schedule(start + int(seconds * 1e9), lambda planned, seconds=seconds: ran.append((seconds, clock.now_ns() - planned)))
+    while len(ran) < 3:
+        scheduler.run_next()
+    assert [seconds for seconds, _ in ran] == [0.1, 0.2, 0.3]
+    assert all(0 <= late < 50_000_000 for _, late in ran) # eclipse ns, 5ms real at 10x
+
+
+def test_deadline_scheduled_from_another_thread_wakes_the_wait():
+    clock = run.VirtualClock(rate=1)
+    scheduler = run.Scheduler(clock.now_ns, clock=clock)
+    ran = []
+    scheduler.schedule(clock.now_ns() + 5_000_000_000, lambda planned: ran.append('late'))
+    def schedule_earlier():
+        scheduler.schedule(clock.now_ns() + 100_000_000, lambda planned: ran.append('early'))
+    threading.Timer(0.05, schedule_earlier).start()
+    start = clock.monotonic()
+    while not ran and clock.monotonic() - start < 2:
+        scheduler.run_next()
+    assert ran == ['early']
+    assert clock.monotonic() - start < 0.5
+
+
+def test_timeline_dispatches_every_instant_once(sequence):
+    t = sequence([{'text': 'interval', 'shutter': '1/250', 'start': 'c2', 'start_offset': -10, 'end': 'c2', 'interval': 2, 'camera_id': 'camera'}])
+    timeline = t.camera_actions.build_timelines(lambda action: action.camera_id, t.events)['camera']
+    c2 = t.events.get('c2').time_ns
+    assert timeline.times.tolist() == [c2 - seconds * 1_000_000_000 for seconds in (10, 8, 6, 4, 2)] # not at its end
+    timeline.seek(c2 - 20_000_000_000)
+    first = timeline.pop_due(c2 - 7_000_000_000)
+    second = timeline.pop_due(c2)
+    assert [planned for _, planned in first] == [c2 - 10_000_000_000, c2 - 8_000_000_000]
+    assert len(second) == 3
+    assert timeline.pop_due(c2) == [] and timeline.next_time() is None
+
+
+def test_timeline_seek_returns_running_continuous_actions(sequence):
+    t = sequence([{'text': 'hold', 'shutter': '1/250', 'start': 'c2', 'start_offset': -5, 'end': 'c2', 'end_offset': 5, 'camera_id': 'camera'},
+        {'text': 'single', 'shutter': '1/250', 'time': 'c2', 'offset': 10, 'camera_id': 'camera'}])
+    timeline = t.camera_actions.build_timelines(lambda action: action.camera_id, t.events)['camera']
+    c2 = t.events.get('c2').time_ns
+    hold, single = t.camera_actions.actions
+    assert timeline.seek(c2) == [hold]
+    assert timeline.peek() is single
+    assert timeline.seek(c2 + 6_000_000_000) == [] # over by then
@@ -0,0 +1,53 @@
+import threading
+
+import run
+
+
+def test_armed_cameras_release_together_at_the_planned_instant():
+    clock = run.VirtualClock(rate=1)
+    planned = clock.now_ns() + 200_000_000
+    release = run.SyncRelease('pair', planned, {'a', 'b'}, window=1, clock=clock)
+    released = {}
+    def camera(cam_id):
+        assert release.wait(cam_id)
+        released[cam_id] = clock.now_ns()
+        release.fired(cam_id, released[cam_id])
+    threads = [threading.Thread(target=camera, args=(cam_id,)) for cam_id in ('a', 'b')]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert release.release == planned
+    assert all(0 <= ns - planned < 20_000_000 for ns in released.values())
+    assert release.skew() == abs(released['a'] - released['b'])
+
+
+def test_camera_that_never_arms_is_left_behind():
+    clock = run.VirtualClock(rate=10)
+    planned = clock.now_ns()
+    release = run.SyncRelease('pair', planned, {'a', 'b'}, window=1, clock=clock)
+    assert release.wait('a') # b never arms
+    assert release.release >= planned + 1_000_000_000 # once its window passed
+
+
+def test_wait_fails_when_preempted_or_the_clock_jumps():
+    clock = run.VirtualClock(rate=1)
+    stop = threading.Event()
+    stop.set()
+    release = run.SyncRelease('pair', clock.now_ns() + 1_000_000_000, {'a'}, window=1, clock=clock)
+    assert release.wait('a', stop) is False
+    release = run.SyncRelease('pair', clock.now_ns() + 2_000_000_000, {'a'}, window=1, clock=clock)
+    threading.Timer(0.05, lambda: clock.jump(clock.now_ns() + 500_000_000)).start()
+    assert release.wait('a') is False
+
+
+def test_skew_counts_each_cameras_first_trigger():
+    clock = run.VirtualClock(rate=1)
+    release = run.SyncRelease('pair', clock.now_ns(), {'a', 'b'}, window=1, clock=clock)
+    release.arm('a')
+    release.arm('b')
+    release.fired('a', 1_000)
+    release.fired('a', 9_000) # resumed after a preemption
+    assert release.skew() is None
+    release.fired('b', 3_000)
+    assert release.skew() == 2_000